@@ -0,0 +1,310 @@
+# 语义阶段性能测试脚本
+# 用法: python benchmark.py <测试项> 文档1.txt [文档2.txt ...]
+import argparse
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import dijkstra
+import intermediate
+import similarity
+import simple_preprocessor
+import uploadFile
+
+
+def load_document_words(path):
+    """读取文档并返回预处理得到的候选词"""
+    title, body = uploadFile.readFile(path)
+    return simple_preprocessor.simple_preprocess(body, title)[0]
+
+
+def load_document_graph(path):
+    """读取文档并按语义特征阶段的方式构建语义图"""
+    graphDatas, _ = similarity.buildGraph(load_document_words(path))
+    return graphDatas
+
+
+def timed(func, *args, **kwargs):
+    """执行函数并返回(结果, 耗时秒数)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def traced(func, *args, **kwargs):
+    """执行函数并返回(结果, 耗时秒数, Python内存分配峰值字节数)"""
+    tracemalloc.start()
+    try:
+        result, cost = timed(func, *args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, cost, peak
+
+
+def bench_dijkstra(args):
+    """比较堆优化的dijkstra与原始扫描实现在真实文档语义图上的耗时"""
+    rows = []
+    for path in args.files:
+        graph = load_document_graph(path)
+        edges = graph.edgeCount()
+        scan_time = heap_time = 0.0
+        consistent = True
+        for source in graph:
+            old, cost = timed(dijkstra.dijkstra_scan, graph, source)
+            scan_time += cost
+            new, cost = timed(dijkstra.dijkstra, graph, source)
+            heap_time += cost
+            # 原始实现不输出不可达顶点，只比较可达部分
+            reachable = {key: dict(value) for key, value in new.items() if value['distance'] != math.inf}
+            consistent &= reachable == old
+        rows.append((path, len(graph), edges, scan_time, heap_time, consistent))
+
+    print(f"{'文档':<30}{'节点':>8}{'边':>8}{'扫描(s)':>10}{'堆(s)':>10}{'加速比':>8}  结果一致")
+    for path, nodes, edges, scan_time, heap_time, consistent in rows:
+        speedup = scan_time / heap_time if heap_time > 0 else float('inf')
+        print(f"{path:<30}{nodes:>8}{edges:>8}{scan_time:>10.3f}{heap_time:>10.3f}{speedup:>8.1f}  {consistent}")
+
+
+def bench_betweenness(args):
+    """比较逐对保存路径的原居间度计算与新的逐源点累加实现，内存为tracemalloc记录的峰值"""
+    print(f"{'文档':<30}{'节点':>8}{'原实现(s)':>12}{'原内存(KB)':>12}{'compat(s)':>12}"
+          f"{'compat内存(KB)':>16}{'brandes(s)':>12}  compat一致")
+    for path in args.files:
+        graph = load_document_graph(path)
+        old, old_time, old_peak = traced(intermediate.getIntermediateByPaths, graph)
+        new, new_time, new_peak = traced(intermediate.getIntermediate, graph, intermediate.BC_COMPAT, args.workers)
+        _, brandes_time = timed(intermediate.getIntermediate, graph, intermediate.BC_BRANDES, args.workers)
+        print(f"{path:<30}{len(graph):>8}{old_time:>12.3f}{old_peak / 1024:>12.1f}{new_time:>12.3f}"
+              f"{new_peak / 1024:>16.1f}{brandes_time:>12.3f}  {old == new}")
+
+
+def ranking(interval):
+    """按居间度降序排列的词语列表，居间度相同时按词语排序"""
+    return [word for word, _ in sorted(interval.items(), key=lambda item: (-item[1], item[0]))]
+
+
+def compare_ranking(exact, approx):
+    """返回(得分变化的词数, 排名变化的位置数, 前10重合数)"""
+    exact_rank, approx_rank = ranking(exact), ranking(approx)
+    changed = sum(1 for word in exact if abs(exact[word] - approx[word]) > 1e-9)
+    moved = sum(1 for a, b in zip(exact_rank, approx_rank) if a != b)
+    overlap = len(set(exact_rank[:10]) & set(approx_rank[:10]))
+    return changed, moved, overlap
+
+
+def bench_engine(args):
+    """比较桶队列最短路径与精确Dijkstra的耗时，并报告居间度排名的偏差"""
+    print(f"{'文档':<30}{'节点':>8}{'量化倍数':>10}{'heap(s)':>10}{'dial(s)':>10}"
+          f"{'得分变化':>10}{'排名变化':>10}{'前10重合':>10}")
+    for path in args.files:
+        graph = load_document_graph(path)
+        exact, heap_time = timed(intermediate.getIntermediate, graph, args.mode)
+        for scale in args.scales:
+            intermediate.DIAL_SCALE = scale
+            approx, dial_time = timed(intermediate.getIntermediate, graph, args.mode,
+                                      engine=intermediate.ENGINE_DIAL)
+            changed, moved, overlap = compare_ranking(exact, approx)
+            print(f"{path:<30}{len(graph):>8}{scale:>10}{heap_time:>10.3f}{dial_time:>10.3f}"
+                  f"{changed:>10}{moved:>10}{overlap:>10}")
+
+
+def bench_cutoff(args):
+    """比较不同搜索半径下居间度的耗时与排名偏差，基准为不限制半径的结果"""
+    print(f"{'文档':<30}{'节点':>8}{'最大距离':>10}{'最大边数':>10}{'耗时(s)':>10}{'加速比':>8}"
+          f"{'得分变化':>10}{'排名变化':>10}{'前10重合':>10}")
+    limits = [(distance, None) for distance in args.distances] + [(None, hops) for hops in args.hops]
+    for path in args.files:
+        graph = load_document_graph(path)
+        exact, exact_time = timed(intermediate.getIntermediate, graph, args.mode)
+        print(f"{path:<30}{len(graph):>8}{'-':>10}{'-':>10}{exact_time:>10.3f}{1.0:>8.1f}"
+              f"{0:>10}{0:>10}{min(10, len(graph)):>10}")
+        for max_distance, max_hops in limits:
+            bounded, cost = timed(intermediate.getIntermediate, graph, args.mode,
+                                  maxDistance=max_distance, maxHops=max_hops)
+            changed, moved, overlap = compare_ranking(exact, bounded)
+            speedup = exact_time / cost if cost > 0 else float('inf')
+            print(f"{path:<30}{len(graph):>8}{max_distance if max_distance is not None else '-':>10}"
+                  f"{max_hops if max_hops is not None else '-':>10}{cost:>10.3f}{speedup:>8.1f}"
+                  f"{changed:>10}{moved:>10}{overlap:>10}")
+
+
+def bench_sparsify(args):
+    """比较阈值建图与k近邻稀疏化的边数、度分布、居间度耗时及排名偏差，基准为只按阈值建图的结果"""
+    print(f"{'文档':<30}{'建图方式':>16}{'节点':>8}{'边':>8}{'最小度':>8}{'中位度':>8}{'平均度':>8}{'最大度':>8}"
+          f"{'居间度(s)':>10}{'得分变化':>10}{'排名变化':>10}{'前10重合':>10}")
+    settings = [(similarity.GRAPH_MIN_SIM, k) for k in args.top_k]
+    if args.no_threshold:
+        settings += [(None, k) for k in args.top_k]
+    for path in args.files:
+        wordsData = load_document_words(path)
+        baseline = None
+        for min_sim, top_k in [(similarity.GRAPH_MIN_SIM, None)] + settings:
+            graph, _ = similarity.buildGraph(wordsData, minSim=min_sim, topK=top_k)
+            interval, cost = timed(intermediate.getIntermediate, graph, args.mode)
+            if baseline is None:
+                baseline = interval
+            # 各方式的顶点集合可能不同，只比较基准图中的词语
+            compared = {word: interval.get(word, 0) for word in baseline}
+            changed, moved, overlap = compare_ranking(baseline, compared)
+            degree = graph.degreeStats()
+            label = f"{'阈值' if min_sim is not None else '无阈值'}{'' if top_k is None else f'+k={top_k}'}"
+            print(f"{path:<30}{label:>16}{len(graph):>8}{graph.edgeCount():>8}{degree['min']:>8}"
+                  f"{degree['median']:>8}{degree['mean']:>8.2f}{degree['max']:>8}{cost:>10.3f}"
+                  f"{changed:>10}{moved:>10}{overlap:>10}")
+
+
+def bench_plan(args):
+    """比较planCentrality对精确计算居间度的耗时估计与实测耗时，用于校验时间预算的设置"""
+    print(f"{'文档':<30}{'节点':>8}{'边':>8}{'实测源点':>10}{'估计(s)':>10}{'实测(s)':>10}{'估计/实测':>10}")
+    for path in args.files:
+        graph = load_document_graph(path)
+        unit, probe_cost = timed(intermediate.unitCost, graph, args.mode)
+        estimate = unit * intermediate._componentWorkload(graph, graph.components())
+        _, cost = timed(intermediate.getIntermediate, graph, args.mode)
+        ratio = estimate / cost if cost else float('nan')
+        print(f"{path:<30}{len(graph):>8}{graph.edgeCount():>8}{probe_cost:>10.3f}{estimate:>10.3f}"
+              f"{cost:>10.3f}{ratio:>10.2f}")
+
+
+# 提取核心模块，均不应依赖界面库
+CORE_MODULES = ['uploadFile', 'tokenizer_manager', 'lexicon', 'token_stream', 'textPrecessing',
+                'simple_preprocessor', 'progress_hook', 'similarity', 'dijkstra', 'intermediate', 'statistics', 'file_processor']
+
+IMPORT_PROBE = '''
+import sys, time
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+print(time.perf_counter() - start, 'PyQt5' in sys.modules, len(sys.modules))
+'''
+
+
+def measure_import(modules):
+    """在新的解释器中导入模块，返回(耗时秒数, 是否加载了PyQt5, 已加载模块数)"""
+    output = subprocess.run([sys.executable, '-c', IMPORT_PROBE] + modules, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+    cost, qt, count = output.strip().splitlines()[-1].split()
+    return float(cost), qt == 'True', int(count)
+
+
+def bench_importtime(args):
+    """在新的解释器中逐个测量核心模块的冷启动导入耗时(取多次中的最小值)，并检查是否加载了PyQt5"""
+    print(f"{'模块':<24}{'导入(ms)':>12}{'模块数':>10}  加载PyQt5")
+    for modules in [[name] for name in args.modules] + [args.modules]:
+        runs = [measure_import(modules) for _ in range(args.repeat)]
+        cost = sorted(run[0] for run in runs)[0]
+        label = modules[0] if len(modules) == 1 else '全部'
+        print(f"{label:<24}{cost * 1000:>12.1f}{runs[0][2]:>10}  {runs[0][1]}")
+
+
+def run_importtime(args):
+    """在新的解释器中以-X importtime运行命令，返回(墙钟耗时秒数, [(模块, 自身耗时微秒, 累计耗时微秒, 嵌套层数)])"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else '运行失败')
+    imports = []
+    for line in result.stderr.splitlines():
+        # 格式为 "import time: 自身 | 累计 | <缩进>模块名"，表头行的数值列不是数字
+        if not line.startswith('import time:'):
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        if not own.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(own), int(cumulative), depth))
+    return wall, imports
+
+
+def bench_coldstart(args):
+    """以命令行方式处理单个文档，用-X importtime统计冷启动的总耗时、导入耗时及最重的顶层导入
+
+    每次运行把文档复制到临时目录，输出目录不受上一次运行影响；jieba前缀词典缓存与二进制词林按正常方式复用
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'file_processor.py')
+    for path in args.files:
+        runs = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                doc = os.path.join(tmp_dir, os.path.basename(path))
+                shutil.copyfile(path, doc)
+                runs.append(run_importtime([script, doc] + (['--prewarm'] if args.prewarm else [])))
+        wall, imports = min(runs, key=lambda run: run[0])
+        import_total = sum(own for _, own, _, _ in imports) / 1e6
+        print(f"{path}: 总耗时 {wall:.3f} 秒，其中导入 {import_total:.3f} 秒({len(imports)} 个模块)")
+        top_level = sorted((item for item in imports if item[3] == 0), key=lambda item: item[2], reverse=True)
+        print(f"  {'顶层导入':<28}{'累计(ms)':>12}")
+        for name, _, cumulative, _ in top_level[:args.top]:
+            print(f"  {name:<28}{cumulative / 1000:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='语义阶段性能测试')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    dijkstra_parser = subparsers.add_parser('dijkstra', help='比较堆优化与原始扫描实现的最短路径计算')
+    dijkstra_parser.add_argument('files', nargs='+', help='测试文档')
+    dijkstra_parser.set_defaults(func=bench_dijkstra)
+
+    betweenness_parser = subparsers.add_parser('betweenness', help='比较居间度的各种计算方式')
+    betweenness_parser.add_argument('files', nargs='+', help='测试文档')
+    betweenness_parser.add_argument('--workers', type=int, default=1, help='居间度计算的进程数')
+    betweenness_parser.set_defaults(func=bench_betweenness)
+
+    engine_parser = subparsers.add_parser('engine', help='比较桶队列与堆实现的最短路径，报告居间度排名偏差')
+    engine_parser.add_argument('files', nargs='+', help='验证文档')
+    engine_parser.add_argument('--mode', default=intermediate.BC_COMPAT,
+                               choices=[intermediate.BC_COMPAT, intermediate.BC_BRANDES], help='居间度计算方式')
+    engine_parser.add_argument('--scales', type=int, nargs='+', default=[intermediate.DIAL_SCALE],
+                               help='边权量化倍数')
+    engine_parser.set_defaults(func=bench_engine)
+
+    cutoff_parser = subparsers.add_parser('cutoff', help='比较限制最短路径搜索半径后居间度的速度与排名偏差')
+    cutoff_parser.add_argument('files', nargs='+', help='验证文档')
+    cutoff_parser.add_argument('--mode', default=intermediate.BC_COMPAT,
+                               choices=[intermediate.BC_COMPAT, intermediate.BC_BRANDES], help='居间度计算方式')
+    cutoff_parser.add_argument('--distances', type=float, nargs='*', default=[1.0, 1.5, 2.0],
+                               help='最短路径的最大长度')
+    cutoff_parser.add_argument('--hops', type=int, nargs='*', default=[2, 3, 4], help='最短路径的最大边数')
+    cutoff_parser.set_defaults(func=bench_cutoff)
+
+    sparsify_parser = subparsers.add_parser('sparsify', help='比较k近邻稀疏化与阈值建图的边数、度分布与居间度')
+    sparsify_parser.add_argument('files', nargs='+', help='验证文档')
+    sparsify_parser.add_argument('--mode', default=intermediate.BC_COMPAT,
+                                 choices=[intermediate.BC_COMPAT, intermediate.BC_BRANDES], help='居间度计算方式')
+    sparsify_parser.add_argument('--top-k', type=int, nargs='+', default=[3, 5, 10], help='每个词语保留的近邻边数')
+    sparsify_parser.add_argument('--no-threshold', action='store_true', help='同时测试不按阈值过滤的k近邻图')
+    sparsify_parser.set_defaults(func=bench_sparsify)
+
+    plan_parser = subparsers.add_parser('plan', help='比较居间度耗时的估计值与精确计算的实测耗时')
+    plan_parser.add_argument('files', nargs='+', help='验证文档')
+    plan_parser.add_argument('--mode', default=intermediate.BC_COMPAT,
+                             choices=[intermediate.BC_COMPAT, intermediate.BC_BRANDES], help='居间度计算方式')
+    plan_parser.set_defaults(func=bench_plan)
+
+    importtime_parser = subparsers.add_parser('importtime', help='测量核心模块的冷启动导入耗时')
+    importtime_parser.add_argument('--modules', nargs='+', default=CORE_MODULES, help='要测量的模块')
+    importtime_parser.add_argument('--repeat', type=int, default=3, help='每个模块的测量次数')
+    importtime_parser.set_defaults(func=bench_importtime)
+
+    coldstart_parser = subparsers.add_parser('coldstart', help='用-X importtime测量命令行处理单个文档的冷启动耗时')
+    coldstart_parser.add_argument('files', nargs='+', help='测试文档')
+    coldstart_parser.add_argument('--repeat', type=int, default=3, help='每个文档的运行次数，报告耗时最短的一次')
+    coldstart_parser.add_argument('--top', type=int, default=10, help='列出的顶层导入个数')
+    coldstart_parser.add_argument('--prewarm', action='store_true', help='处理前预先加载全部词典')
+    coldstart_parser.set_defaults(func=bench_coldstart)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import runtime_cache
+
+# 二进制词林文件格式：
+#   文件头 | 编码文本(每个8字节) | 按编码排序的编号表 | 词语偏移 | 倒排表偏移 | 倒排表(编码编号) | 词语UTF-8文本
+# 所有整数均为本机字节序的uint32，文件头中记录字节序，不一致时重新编译
+# 编码的分层整数和前缀计数由sim_matrix按编码计算并在进程内缓存，不写入文件
+MAGIC = b'CLNB'
+VERSION = 2
+HEADER = struct.Struct('<4sIB3x32sIIII')
+CODE_WIDTH = 8
+LEVELS = 6
+# 各层级在8位编码中的起止位置：大类、中类、小类(2位)、词群、原子词群(2位)、标记
+LEVEL_SLICES = ((0, 1), (1, 2), (2, 4), (4, 5), (5, 7), (7, 8))
+
+ARTIFACT_NAME = 'cilin.bin'
+
+
+def encode_code(code):
+    """将8位词林编码转换为每层一个整数的元组"""
+    levels = []
+    for start, end in LEVEL_SLICES:
+        part = code[start:end]
+        levels.append(int(part) if end - start == 2 else ord(part))
+    return tuple(levels)
+
+
+def compile_cilin(cilinData, sourceHash, targetPath):
+    """将解析后的词林数据编译为紧凑的二进制文件"""
+    codes = list(cilinData.keys())
+    codeIds = {code: i for i, code in enumerate(codes)}
+
+    codeText = bytearray()
+    for code in codes:
+        codeText += code.encode('ascii').ljust(CODE_WIDTH, b' ')[:CODE_WIDTH]
+
+    # 按编码排序的编号表，前缀计数在其上二分得到
+    sortedIds = array('I', sorted(range(len(codes)), key=lambda i: codes[i]))
+
+    # 词语按UTF-8字节序排序，运行时可以二分查找
+    wordCodes = {}
+    for code, words in cilinData.items():
+        for word in dict.fromkeys(words):
+            wordCodes.setdefault(word.encode('utf-8'), []).append(codeIds[code])
+    sortedWords = sorted(wordCodes)
+    wordOffsets = array('I', [0])
+    postOffsets = array('I', [0])
+    postings = array('I')
+    wordBlob = bytearray()
+    for word in sortedWords:
+        wordBlob += word
+        wordOffsets.append(len(wordBlob))
+        postings.extend(wordCodes[word])
+        postOffsets.append(len(postings))
+
+    header = HEADER.pack(MAGIC, VERSION, 0 if sys.byteorder == 'little' else 1,
+                         bytes.fromhex(sourceHash), len(codes), len(sortedWords),
+                         len(postings), len(wordBlob))
+    data = b''.join([header, bytes(codeText), sortedIds.tobytes(), wordOffsets.tobytes(),
+                     postOffsets.tobytes(), postings.tobytes(), bytes(wordBlob)])
+    runtime_cache.atomic_write(targetPath, data)
+
+
+class _PrefixCounts:
+    """前缀计数表的只读视图，提供与字典相同的get接口，查询结果在进程内缓存"""
+
+    def __init__(self, store):
+        self._store = store
+        self._counts = {}
+
+    def get(self, prefix, default=0):
+        count = self._counts.get(prefix)
+        if count is None:
+            count = self._counts[prefix] = self._store.countPrefix(prefix)
+        return count if count else default
+
+
+class CilinStore:
+    """内存映射的二进制词林，接口与similarity.CilinIndex保持一致"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, byteorder, digest, nCodes, nWords,
+         nPostings, blobLen) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"二进制词林格式不匹配: {path}")
+        if byteorder != (0 if sys.byteorder == 'little' else 1):
+            raise ValueError(f"二进制词林字节序与本机不一致: {path}")
+        self.sourceHash = digest.hex()
+        self.codeCount = nCodes
+        self.wordCount = nWords
+
+        view = memoryview(self._mm)
+        offset = HEADER.size
+        self._codeText = view[offset:offset + nCodes * CODE_WIDTH]
+        offset += nCodes * CODE_WIDTH
+        self._sortedIds = view[offset:offset + nCodes * 4].cast('I')
+        offset += nCodes * 4
+        self._wordOffsets = view[offset:offset + (nWords + 1) * 4].cast('I')
+        offset += (nWords + 1) * 4
+        self._postOffsets = view[offset:offset + (nWords + 1) * 4].cast('I')
+        offset += (nWords + 1) * 4
+        self._postings = view[offset:offset + nPostings * 4].cast('I')
+        offset += nPostings * 4
+        self._wordBlob = view[offset:offset + blobLen]
+        if offset + blobLen != len(self._mm):
+            raise ValueError(f"二进制词林文件长度异常: {path}")
+
+        self.prefixCount = _PrefixCounts(self)
+        self._codeStrs = {}
+
+    def codeAt(self, codeId):
+        """按编号取出编码字符串"""
+        code = self._codeStrs.get(codeId)
+        if code is None:
+            start = codeId * CODE_WIDTH
+            code = bytes(self._codeText[start:start + CODE_WIDTH]).decode('ascii').rstrip()
+            self._codeStrs[codeId] = code
+        return code
+
+    def findWord(self, word):
+        """二分查找词语编号，词林中缺失时返回-1"""
+        target = word.encode('utf-8')
+        offsets, blob = self._wordOffsets, self._wordBlob
+        lo, hi = 0, self.wordCount
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = bytes(blob[offsets[mid]:offsets[mid + 1]])
+            if current < target:
+                lo = mid + 1
+            elif current > target:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def getCodeIds(self, word):
+        """获取词语全部编码的编号，保持词林文件中的顺序"""
+        wordId = self.findWord(word)
+        if wordId < 0:
+            return []
+        return list(self._postings[self._postOffsets[wordId]:self._postOffsets[wordId + 1]])
+
+    def getCodes(self, word):
+        """获取词语在词林中的全部编码，词林中缺失时返回空列表"""
+        return [self.codeAt(codeId) for codeId in self.getCodeIds(word)]
+
+    def _bisect(self, prefix, inclusive):
+        # 在按编码排序的编号表上二分，比较编码的前len(prefix)位
+        size = len(prefix)
+        lo, hi = 0, self.codeCount
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self._sortedIds[mid] * CODE_WIDTH
+            current = bytes(self._codeText[start:start + size])
+            if current < prefix or (inclusive and current == prefix):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def countPrefix(self, prefix):
+        """统计以指定前缀开头的编码个数"""
+        if not prefix:
+            return 0
+        prefix = prefix.encode('ascii')
+        return self._bisect(prefix, True) - self._bisect(prefix, False)
+
+
+def load(sourcePath, parser):
+    """加载二进制词林；源文件哈希变化或文件损坏时调用parser重新解析并编译"""
+    sourceHash = runtime_cache.file_hash(sourcePath)
+    targetPath = os.path.join(runtime_cache.get_cache_dir(), ARTIFACT_NAME)
+    if os.path.exists(targetPath):
+        try:
+            store = CilinStore(targetPath)
+            if store.sourceHash == sourceHash:
+                return store
+            print("词林源文件已变化，重新编译二进制词林")
+        except (ValueError, TypeError, struct.error) as e:
+            print(f"二进制词林无效，重新编译: {str(e)}")
+    compile_cilin(parser(), sourceHash, targetPath)
+    return CilinStore(targetPath)
+
+
+if __name__ == '__main__':
+    import similarity
+    store = load(similarity.cilinPath, similarity.cilin)
+    print(f"二进制词林编译完成: {store.codeCount} 个编码, {store.wordCount} 个词语")
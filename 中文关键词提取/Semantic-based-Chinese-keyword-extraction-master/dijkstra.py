@@ -1,4 +1,8 @@
 #encoding=utf-8
+import heapq
+from collections.abc import Mapping
+
+from word_graph import WordGraph
 
 
 # 完成距离计算(当前中心点标记值+中心点到此点的权值)
@@ -6,8 +10,266 @@ def dijkstra_score(G, shortest_distances, v, w):
     return shortest_distances[v] + G[v][w]
 
 
+# 基于二叉堆、以顶点编号计算的最短路径树，G为WordGraph，start为起点编号
+# 返回(顶点标记顺序, 最短距离列表, 前驱编号列表)，不可达顶点的距离为inf、前驱为-1
+# 堆中按(距离, 起点的标记次序, 终点在起点邻接表中的位置)排序，边在CSR数组中的下标与邻接表中的位置同序，
+# 距离相同时与dijkstra_scan选中相同的顶点和路径
+# maxDistance、maxHops为搜索半径：距离超过maxDistance的顶点不再入堆，路径已有maxHops条边的顶点不再向外扩展，
+# 超出半径的顶点按不可达处理
+def shortest_path_tree_csr(G, start, maxDistance=None, maxHops=None):
+    offsets, neighbors, weights = G.offsets, G.neighbors, G.weights
+    size = len(G)
+    limit = float('inf') if maxDistance is None else maxDistance
+    hops = [0] * size if maxHops is not None else None
+    distances = [float('inf')] * size
+    predecessors = [-1] * size
+    settled = bytearray(size)
+    distances[start] = 0
+    settled[start] = 1
+    order = [start]
+    heap = []
+    tail, rank = start, 0
+    while True:
+        length = distances[tail]
+        if hops is None or hops[tail] < maxHops:
+            for position in range(offsets[tail], offsets[tail + 1]):
+                head = neighbors[position]
+                distance = length + weights[position]
+                # 后标记的起点次序更大，距离不更短时不可能被选中，无需入堆
+                if not settled[head] and distance < distances[head] and distance <= limit:
+                    distances[head] = distance
+                    heapq.heappush(heap, (distance, rank, position, head, tail))
+        while heap and settled[heap[0][3]]:
+            heapq.heappop(heap)
+        if not heap:
+            break
+        length, _, _, head, tail = heapq.heappop(heap)
+        distances[head] = length
+        predecessors[head] = tail
+        settled[head] = 1
+        if hops is not None:
+            hops[head] = hops[tail] + 1
+        order.append(head)
+        tail, rank = head, len(order) - 1
+    return order, distances, predecessors
+
+
+# 单个源点的最短路径树，以顶点编号的前驱数组保存，路径在需要时沿前驱回溯得到
+class ShortestTree:
+    __slots__ = ('vocab', 'order', 'distances', 'predecessors')
+
+    def __init__(self, vocab, order, distances, predecessors):
+        self.vocab = vocab
+        self.order = order
+        self.distances = distances
+        self.predecessors = predecessors
+
+    def pathIds(self, vertex):
+        """起点到指定顶点的路径(顶点编号列表)，不可达时返回None"""
+        if self.predecessors[vertex] < 0 and vertex != self.order[0]:
+            return None
+        nodes = []
+        while vertex >= 0:
+            nodes.append(vertex)
+            vertex = self.predecessors[vertex]
+        nodes.reverse()
+        return nodes
+
+    def path(self, vertex):
+        """起点到指定顶点的路径字符串(以'->'连接)，不可达时返回None"""
+        nodes = self.pathIds(vertex)
+        if nodes is None:
+            return None
+        return '->'.join(self.vocab[node] for node in nodes)
+
+
+# 单个顶点的最短路径信息，路径字符串在首次访问时才根据前驱数组拼接
+class ShortestEntry(Mapping):
+    __slots__ = ('_tree', '_vertex', '_path')
+
+    def __init__(self, tree, vertex):
+        self._tree = tree
+        self._vertex = vertex
+        self._path = None
+
+    def __getitem__(self, key):
+        if key == 'distance':
+            return self._tree.distances[self._vertex]
+        if key == 'path':
+            if self._path is None:
+                self._path = self._tree.path(self._vertex)
+            return self._path
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(('path', 'distance'))
+
+    def __len__(self):
+        return 2
+
+
 # 此算法完成了从任意指定点startNode到图中任意一点最短距离的计算
-def dijkstra(G, startNode):
+# 返回{顶点: {'path': 路径, 'distance': 距离}}，不可达顶点的距离为inf、路径为None
+# 同一源点的全部结果共用一份前驱数组；maxDistance、maxHops为搜索半径，超出半径的顶点按不可达处理
+def dijkstra(G, startNode, maxDistance=None, maxHops=None):
+    if startNode not in G:
+        raise Exception('invild node!')
+    graph = WordGraph.fromDict(G)
+    order, distances, predecessors = shortest_path_tree_csr(graph, graph.index[startNode], maxDistance, maxHops)
+    tree = ShortestTree(graph.vocab, order, distances, predecessors)
+    shortest_data = {}
+    for vertex in order:
+        shortest_data[graph.vocab[vertex]] = ShortestEntry(tree, vertex)
+    for vertex in range(len(graph)):
+        if predecessors[vertex] < 0 and vertex != order[0]:
+            shortest_data[graph.vocab[vertex]] = ShortestEntry(tree, vertex)
+    return shortest_data
+
+
+# 以顶点编号计算的最短路径有向无环图，用于Brandes居间度计算
+# 返回(顶点标记顺序, 最短路径条数列表, 前驱编号列表)，距离相等的路径全部保留
+# maxDistance、maxHops与shortest_path_tree_csr相同，步数按首次到达时的前驱计算
+def shortest_path_dag_csr(G, start, maxDistance=None, maxHops=None):
+    offsets, neighbors, weights = G.offsets, G.neighbors, G.weights
+    size = len(G)
+    limit = float('inf') if maxDistance is None else maxDistance
+    hops = [0] * size if maxHops is not None else None
+    seen = [float('inf')] * size
+    settled = bytearray(size)
+    sigma = [0] * size
+    predecessors = [None] * size
+    seen[start] = 0
+    sigma[start] = 1
+    predecessors[start] = []
+    order = []
+    heap = [(0, 0, start)]
+    count = 1
+    while heap:
+        length, _, tail = heapq.heappop(heap)
+        if settled[tail]:
+            continue
+        settled[tail] = 1
+        order.append(tail)
+        if hops is not None and hops[tail] >= maxHops:
+            continue
+        for position in range(offsets[tail], offsets[tail + 1]):
+            head = neighbors[position]
+            distance = length + weights[position]
+            if distance > limit:
+                continue
+            if not settled[head] and distance < seen[head]:
+                seen[head] = distance
+                heapq.heappush(heap, (distance, count, head))
+                count += 1
+                sigma[head] = sigma[tail]
+                predecessors[head] = [tail]
+                if hops is not None:
+                    hops[head] = hops[tail] + 1
+            elif distance == seen[head]:
+                sigma[head] += sigma[tail]
+                predecessors[head].append(tail)
+    return order, sigma, predecessors
+
+
+# 基于桶队列(Dial算法)的最短路径树，weights为量化后的正整数边权，maxWeight为其最大值
+# 边权范围很窄时每个源点的代价为O(E + 最大距离)；返回值与shortest_path_tree_csr相同，距离为量化后的整数
+# 距离相同时先到达的前驱优先，与堆实现的选择规则一致，差异只来自量化造成的距离相等
+# maxDistance(量化后的整数)、maxHops与shortest_path_tree_csr相同
+def shortest_path_tree_dial(G, start, weights, maxWeight, maxDistance=None, maxHops=None):
+    offsets, neighbors = G.offsets, G.neighbors
+    size = len(G)
+    limit = float('inf') if maxDistance is None else maxDistance
+    hops = [0] * size if maxHops is not None else None
+    distances = [float('inf')] * size
+    predecessors = [-1] * size
+    settled = bytearray(size)
+    # 距离为d的顶点放在第d % width个桶中，待处理的距离不会超过当前距离+maxWeight
+    width = maxWeight + 1
+    buckets = [[] for _ in range(width)]
+    distances[start] = 0
+    buckets[0].append(start)
+    pending = 1
+    order = []
+    current = 0
+    while pending:
+        items = buckets[current % width]
+        buckets[current % width] = []
+        pending -= len(items)
+        for tail in items:
+            # 跳过已被更短距离取代的旧记录
+            if settled[tail] or distances[tail] != current:
+                continue
+            settled[tail] = 1
+            order.append(tail)
+            if hops is not None and hops[tail] >= maxHops:
+                continue
+            for position in range(offsets[tail], offsets[tail + 1]):
+                head = neighbors[position]
+                distance = current + weights[position]
+                if distance < distances[head] and distance <= limit:
+                    distances[head] = distance
+                    predecessors[head] = tail
+                    if hops is not None:
+                        hops[head] = hops[tail] + 1
+                    buckets[distance % width].append(head)
+                    pending += 1
+        current += 1
+    return order, distances, predecessors
+
+
+# 基于桶队列的最短路径有向无环图，返回值与shortest_path_dag_csr相同，按量化后的距离判断路径是否等长
+def shortest_path_dag_dial(G, start, weights, maxWeight, maxDistance=None, maxHops=None):
+    offsets, neighbors = G.offsets, G.neighbors
+    size = len(G)
+    limit = float('inf') if maxDistance is None else maxDistance
+    hops = [0] * size if maxHops is not None else None
+    distances = [float('inf')] * size
+    settled = bytearray(size)
+    sigma = [0] * size
+    predecessors = [None] * size
+    width = maxWeight + 1
+    buckets = [[] for _ in range(width)]
+    distances[start] = 0
+    sigma[start] = 1
+    predecessors[start] = []
+    buckets[0].append(start)
+    pending = 1
+    order = []
+    current = 0
+    while pending:
+        items = buckets[current % width]
+        buckets[current % width] = []
+        pending -= len(items)
+        for tail in items:
+            if settled[tail] or distances[tail] != current:
+                continue
+            settled[tail] = 1
+            order.append(tail)
+            if hops is not None and hops[tail] >= maxHops:
+                continue
+            for position in range(offsets[tail], offsets[tail + 1]):
+                head = neighbors[position]
+                distance = current + weights[position]
+                if distance > limit:
+                    continue
+                if distance < distances[head]:
+                    distances[head] = distance
+                    sigma[head] = sigma[tail]
+                    predecessors[head] = [tail]
+                    if hops is not None:
+                        hops[head] = hops[tail] + 1
+                    buckets[distance % width].append(head)
+                    pending += 1
+                elif distance == distances[head]:
+                    sigma[head] += sigma[tail]
+                    predecessors[head].append(tail)
+        current += 1
+    return order, sigma, predecessors
+
+
+# 此算法完成了从任意指定点startNode到图中任意一点最短距离的计算
+# 原始实现：每轮扫描全部已标记顶点的邻接点，保留用于对照和性能测试
+def dijkstra_scan(G, startNode):
     # 未标记顶点集合
     unprocessed = set(G.keys())  # vertices whose shortest paths from source have not yet been calculated
     # 初始，将起始点移出
@@ -65,6 +327,3 @@ def dijkstra(G, startNode):
         }
 
     return shortest_data
-
-if __name__ == '__main__':
-    pass
\ No newline at end of file
@@ -1,15 +1,72 @@
+import atexit
 import os
+import time
 from collections import defaultdict
 import textPrecessing
 import intermediate
+import similarity
+import sim_store
+import runtime_cache
+import token_stream
+import tokenizer_manager
+import lexicon
 import statistics
 import outPut
 import json
 
+# 处理阶段，按顺序执行
+STAGES = ["预处理", "提取语义特征", "提取统计特征", "计算词语得分"]
+
+
+def prewarm():
+    """预先加载分词词典、jieba.analyse的IDF词典、词林、NumPy和停用词，返回耗时秒数
+
+    各资源默认在首次使用时才加载，命令行处理单个文档时不必加载用不到的资源；
+    常驻服务可在接收请求前调用，避免第一个请求承担加载耗时
+    """
+    startTime = time.perf_counter()
+    tokenizer_manager.get_pos_tokenizer()
+    tokenizer_manager.get_analyse()
+    similarity.getCilinIndex()
+    similarity.getSimMatrix()
+    lexicon.stop_words()
+    return time.perf_counter() - startTime
+
+
 class FileProcessor:
     def __init__(self):
         self.cache = {}  # 用于缓存处理结果
+        self.cache_size = 1000  # 缓存的文档数上限，超出时丢弃最早加入的文档
         self.use_simple_preprocess = True  # 默认使用简化预处理
+        self.sim_cache = similarity.CodeSimCache()  # 编码对相似度缓存，在本会话的所有文档间共享
+        self.sim_store = self._open_sim_store()  # 持久化的词语对相似度存储，重启后仍可复用
+        self.bc_workers = 1  # 居间度计算的进程数，批量处理多核机器上可调大，None表示使用全部CPU核
+        # 居间度计算时最短路径的搜索半径(路径长度、边数)，大图上可设置以缩短耗时，None表示不限制
+        self.bc_max_distance = None
+        self.bc_max_hops = None
+        # 建图的相似度阈值(None表示不按阈值过滤)及每个词语保留的近邻边数(None表示只按阈值建图)
+        self.graph_min_sim = similarity.GRAPH_MIN_SIM
+        self.graph_top_k = None
+        # 单个文档语义阶段的时间预算(秒)，超出预算的大文档改用抽样或稀疏化计算居间度，None表示不限制；
+        # 启用后大文档的关键词会随机器速度变化，设置前先用benchmark.py plan核对耗时估计。
+        # 与bc_approx_min_nodes均为None(默认)时，所有文档都精确计算居间度
+        self.semantic_time_budget = None
+        # 语义图顶点数超过该值时改用抽样近似计算居间度(建议值intermediate.APPROX_MIN_NODES)，None表示始终精确计算
+        self.bc_approx_min_nodes = None
+        # 是否用tracemalloc记录建图阶段的Python内存分配峰值，建图会慢数倍，只用于排查内存问题
+        self.trace_memory = False
+
+    def _open_sim_store(self):
+        """打开持久化的词语对相似度存储，打开失败时不使用存储"""
+        try:
+            cilin_hash = runtime_cache.file_hash(similarity.cilinPath)
+            store = sim_store.SimStore(cilin_hash)
+            # 退出时写回命中记录的使用时间，并淘汰超出上限的记录
+            atexit.register(store.close)
+            return store
+        except Exception as e:
+            print(f"打开词语相似度存储失败: {str(e)}")
+            return None
 
     def process_file(self, file_path, stage):
         """处理单个文件"""
@@ -61,6 +118,18 @@ class FileProcessor:
                 print(f"备用读取方式也失败: {str(e2)}")
                 return "", ""
 
+    def _token_stream(self, text, title):
+        """文档共用的分词结果，按文本缓存，预处理与统计特征等阶段对每篇文档只分词一次"""
+        key = ('tokens', text)
+        stream = self.cache.get(key)
+        if stream is None:
+            body = text.replace(title + "。", "", 1) if title else text
+            stream = token_stream.TokenStream(title, body)
+            self.cache[key] = stream
+            while len(self.cache) > self.cache_size:
+                self.cache.pop(next(iter(self.cache)))
+        return stream
+
     def _preprocess(self, text, title, output_dir):
         """预处理阶段"""
         try:
@@ -84,7 +153,7 @@ class FileProcessor:
                     import simple_preprocessor
                     
                     # 调用简化预处理
-                    result = simple_preprocessor.simple_preprocess(body, title)
+                    result = simple_preprocessor.simple_preprocess(body, title, self._token_stream(text, title))
                     
                     # 确保返回的是完整的元组
                     if not result or len(result) != 8:
@@ -135,7 +204,7 @@ class FileProcessor:
                     import textPrecessing
                     
                     # 调用原始预处理
-                    result = textPrecessing.word_segmentation(body, title)
+                    result = textPrecessing.word_segmentation(body, title, self._token_stream(text, title))
                     
                     # 确保返回的是完整的元组
                     if not result or len(result) != 8:
@@ -180,7 +249,30 @@ class FileProcessor:
             self._load_preprocess_results(output_dir)
 
         # 计算语义密度
-        interDensity = intermediate.getDensity(wordsData)
+        semantic_stats = {}
+        interDensity = intermediate.getDensity(wordsData, simCache=self.sim_cache, simStore=self.sim_store,
+                                               stats=semantic_stats, workers=self.bc_workers,
+                                               maxDistance=self.bc_max_distance, maxHops=self.bc_max_hops,
+                                               minSim=self.graph_min_sim, topK=self.graph_top_k,
+                                               timeBudget=self.semantic_time_budget,
+                                               approxMinNodes=self.bc_approx_min_nodes,
+                                               traceMemory=self.trace_memory)
+        print(f"语义图: {semantic_stats['nodeCount']} 个节点，{semantic_stats['edgeCount']} 条边，"
+              f"{semantic_stats['componentCount']} 个连通分量(最大 {semantic_stats['largestComponent']} 个节点)")
+        if 'graphPeakMemory' in semantic_stats:
+            print(f"建图内存峰值(tracemalloc): {semantic_stats['graphPeakMemory'] / 1024:.1f} KB")
+        if semantic_stats['graphPeakRss'] is not None:
+            print(f"建图阶段常驻内存峰值: {semantic_stats['graphPeakRss'] / 1024 / 1024:.1f} MB"
+                  f"(开始时 {semantic_stats['graphStartRss'] / 1024 / 1024:.1f} MB)")
+        degree = semantic_stats['degree']
+        print(f"节点度数: 最小 {degree['min']}，中位 {degree['median']}，平均 {degree['mean']:.2f}，最大 {degree['max']}")
+        print(f"居间度计算策略: {semantic_stats['strategy']}，语义阶段耗时 {semantic_stats['semanticSeconds']:.2f} 秒")
+        cache_stats = self.sim_cache.stats()
+        print(f"编码对相似度缓存: 命中 {cache_stats['hits']} 次，未命中 {cache_stats['misses']} 次，"
+              f"命中率 {cache_stats['hitRate']:.2%}")
+        if self.sim_store is not None:
+            store_stats = self.sim_store.stats()
+            print(f"词语相似度存储: 读取 {store_stats['hits']} 对，写入 {store_stats['writes']} 对")
 
         # 处理前后继关系
         interDensity, wordsData, wordsFlagDict = self._add_word(interDensity, wordsData, wordsFlagDict,
@@ -188,6 +280,7 @@ class FileProcessor:
 
         # 保存语义特征
         self._save_semantic_features(interDensity, output_dir)
+        self._save_feature(semantic_stats, "semanticStats", os.path.join(output_dir, "语义特征"))
 
         return interDensity, wordsData, wordsFlagDict
 
@@ -215,7 +308,7 @@ class FileProcessor:
             print("计算TF-IDF特征...")
             try:
                 import statistics
-                wordsTfidf = statistics.getTfidf(len(wordsData), text)
+                wordsTfidf = statistics.getTfidf(len(wordsData), text, self._token_stream(text, title))
                 
                 # 确保所有候选词都有TF-IDF值
                 for word in wordsData:
@@ -1039,4 +1132,26 @@ class FileProcessor:
             return True
         except Exception as e:
             print(f"保存关键词时出错: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
+
+
+def main(argv=None):
+    """命令行入口：对单个文档依次执行全部处理阶段"""
+    import argparse
+    parser = argparse.ArgumentParser(description='提取单个文档的关键词，结果保存在文档旁的<文件名>_output目录')
+    parser.add_argument('file', help='文档路径')
+    parser.add_argument('--prewarm', action='store_true', help='处理前预先加载全部词典')
+    args = parser.parse_args(argv)
+
+    if args.prewarm:
+        print(f"预热完成，耗时 {prewarm():.3f} 秒")
+    processor = FileProcessor()
+    for stage in STAGES:
+        result = processor.process_file(args.file, stage)
+    _, keywords = result
+    for i, (word, score) in enumerate(keywords, 1):
+        print(f"{i}. {word} ({score:.4f})")
+
+
+if __name__ == '__main__':
+    main()
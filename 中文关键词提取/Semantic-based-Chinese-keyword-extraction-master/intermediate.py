@@ -2,6 +2,26 @@ import dijkstra
 from collections import defaultdict
 import similarity
 import math
+import os
+import progress_hook
+import random
+import time
+import tracemalloc
+from word_graph import WordGraph
+# NumPy可用时在居间度数组上划分区间，首次划分时才导入，False表示尚未尝试导入
+_numpy = False
+
+
+def _loadNumpy():
+    """NumPy可用时返回numpy模块，否则返回None，每个进程只导入一次"""
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = None
+    return _numpy
 
 
 # 计算指定顶点的居间度
@@ -22,7 +42,442 @@ def intermediaryDegreeScore(word, shortestDatas):
                     continue
     return Score
 
-def getIntermediate(graphDatas):
+# 居间度计算方式：
+#   compat  与原实现一致，每对顶点只取dijkstra选中的一条最短路径，路径字符串包含该词语即计1
+#           (起点、终点以及作为其他词语子串出现都计数)
+#   brandes 标准的加权居间度，多条等长最短路径平分计数，不计端点
+BC_COMPAT = 'compat'
+BC_BRANDES = 'brandes'
+
+
+# 并行计算时每个任务处理的源点个数，分块与进程数无关，保证结果不随进程数变化
+PARALLEL_CHUNK = 32
+# 需要逐源点计算的顶点数少于该值时进程启动的开销大于收益，直接在当前进程计算
+PARALLEL_MIN_NODES = 200
+# 顶点数不超过该值的连通分量直接按公式计算：单个顶点不构成顶点对，两个顶点只有两条路径且没有中间顶点
+TINY_COMPONENT = 2
+
+# 最短路径的计算方式：
+#   heap 二叉堆Dijkstra，结果精确
+#   dial 边权按DIAL_SCALE量化为整数后使用桶队列，语义图边权集中在[0.37, 0.67]，每个源点的代价接近线性，
+#        量化可能使原本不等长的路径变为等长，从而选中不同的最短路径(可用benchmark.py engine检查偏差)
+ENGINE_HEAP = 'heap'
+ENGINE_DIAL = 'dial'
+DIAL_SCALE = 100
+
+
+# 逐个源点计算最短路径树后立即累加，不保存全部顶点对之间的路径
+# 语义图转换为WordGraph后按连通分量拆分，最短路径只在分量内部展开，返回时再转换为{词语: 居间度}
+# workers为进程数，大于1时各分量的源点分块交给进程池计算，None表示使用全部CPU核；engine为最短路径的计算方式
+# maxDistance、maxHops为最短路径的搜索半径(路径长度、边数)，超出半径的顶点对不参与计数，None表示不限制
+def getIntermediate(graphDatas, mode=BC_COMPAT, workers=1, engine=ENGINE_HEAP, maxDistance=None, maxHops=None):
+    if mode not in (BC_COMPAT, BC_BRANDES):
+        raise ValueError(f"未知的居间度计算方式: {mode}")
+    if engine not in (ENGINE_HEAP, ENGINE_DIAL):
+        raise ValueError(f"未知的最短路径计算方式: {engine}")
+    graph = WordGraph.fromDict(graphDatas)
+    components = graph.components()
+    cutoff = (maxDistance, maxHops)
+    state = _componentState(graph, mode, components, engine, cutoff)
+    scores = [0 if mode == BC_COMPAT else 0.0] * len(graph)
+
+    tasks = []
+    for index, members in enumerate(components):
+        if len(members) <= TINY_COMPONENT:
+            _addTinyComponent(state, members, scores)
+        else:
+            tasks.extend((index, start, min(start + PARALLEL_CHUNK, len(members)))
+                         for start in range(0, len(members), PARALLEL_CHUNK))
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    partials = None
+    if workers > 1 and sum(end - start for _, start, end in tasks) >= PARALLEL_MIN_NODES:
+        try:
+            # 多进程只在批量处理时使用，单进程运行时不导入multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # 语义图通过initializer在每个进程中只传递一次，任务只传递分量编号和源点区间
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_initWorker,
+                                     initargs=(graph, mode, components, engine, cutoff)) as executor:
+                results = []
+                for partial in executor.map(_workerTaskScores, tasks,
+                                            chunksize=max(1, len(tasks) // (workers * 4))):
+                    results.append(partial)
+                    progress_hook.reportProgress(progress_hook.PROGRESS_BETWEENNESS, len(results), len(tasks))
+                partials = results
+        except Exception as e:
+            print(f"并行计算居间度失败，改为单进程计算: {str(e)}")
+    if partials is None:
+        partials = []
+        for task in tasks:
+            partials.append(_taskScores(state, task))
+            progress_hook.reportProgress(progress_hook.PROGRESS_BETWEENNESS, len(partials), len(tasks))
+
+    # 按任务顺序归约各部分的累加值
+    for partial in partials:
+        for word, score in partial.items():
+            scores[word] += score
+    return dict(zip(graph.vocab, scores))
+
+
+# 各分量共用的计算数据，分量子图及其compat数据在首次用到时生成
+# cutoff为(maxDistance, maxHops)
+def _componentState(graph, mode, components, engine=ENGINE_HEAP, cutoff=(None, None)):
+    context = _compatContext(graph) if mode == BC_COMPAT else None
+    return {'graph': graph, 'mode': mode, 'engine': engine, 'cutoff': cutoff, 'context': context,
+            'components': components, 'parts': {}}
+
+
+# 分量的子图、顶点编号、compat数据及单源最短路径函数
+def _componentPart(state, index):
+    part = state['parts'].get(index)
+    if part is None:
+        members = state['components'][index]
+        subgraph = state['graph'].subgraph(members)
+        compat = state['mode'] == BC_COMPAT
+        context = _componentContext(members, state['context']) if compat else None
+        maxDistance, maxHops = state['cutoff']
+        if state['engine'] == ENGINE_DIAL:
+            weights = subgraph.quantizedWeights(DIAL_SCALE)
+            maxWeight = max(weights, default=1)
+            # 搜索半径按与边权相同的倍数量化
+            limit = None if maxDistance is None else round(maxDistance * DIAL_SCALE)
+            if compat:
+                search = lambda source: dijkstra.shortest_path_tree_dial(subgraph, source, weights, maxWeight,
+                                                                         limit, maxHops)
+            else:
+                search = lambda source: dijkstra.shortest_path_dag_dial(subgraph, source, weights, maxWeight,
+                                                                        limit, maxHops)
+        elif compat:
+            search = lambda source: dijkstra.shortest_path_tree_csr(subgraph, source, maxDistance, maxHops)
+        else:
+            search = lambda source: dijkstra.shortest_path_dag_csr(subgraph, source, maxDistance, maxHops)
+        part = state['parts'][index] = (subgraph, members, context, search)
+    return part
+
+
+# 计算一个分量中第start~end-1个源点(分量内编号)的居间度累加值，返回{词语编号: 累加值}
+def _taskScores(state, task):
+    index, start, end = task
+    subgraph, members, context, search = _componentPart(state, index)
+    if state['mode'] == BC_COMPAT:
+        singles, multiple, spanning, contained = context
+        scores = dict.fromkeys([word for word, _ in singles], 0)
+        scores.update((word, 0) for word, _ in multiple)
+        scores.update((word, 0) for word, _ in spanning)
+        for source in range(start, end):
+            _addCompatSource(subgraph, source, context, scores, search(source))
+        return scores
+    local = [0.0] * len(members)
+    for source in range(start, end):
+        _addBrandesSource(source, search(source), local)
+    return dict(zip(members, local))
+
+
+# 单个顶点或两个顶点的分量：两条路径各包含两个顶点，没有中间顶点，超出搜索半径的路径不计数
+def _addTinyComponent(state, members, scores):
+    if len(members) < 2 or state['mode'] != BC_COMPAT:
+        return
+    covers, contained, spanning = state['context']
+    graph = state['graph']
+    vocab = graph.vocab
+    first, second = vocab[members[0]], vocab[members[1]]
+    forward = _withinCutoff(state, graph[first].get(second))
+    backward = _withinCutoff(state, graph[second].get(first))
+    for word in set(contained[members[0]]) | set(contained[members[1]]):
+        scores[word] += forward + backward
+    for word, target in spanning:
+        scores[word] += (forward and target in first + '->' + second) + (backward and target in second + '->' + first)
+
+
+# 单条边构成的路径是否在搜索半径内，桶队列方式按量化后的长度判断
+def _withinCutoff(state, weight):
+    maxDistance, maxHops = state['cutoff']
+    if weight is None or maxHops is not None and maxHops < 1:
+        return False
+    if maxDistance is None:
+        return True
+    if state['engine'] == ENGINE_DIAL:
+        return max(1, round(weight * DIAL_SCALE)) <= round(maxDistance * DIAL_SCALE)
+    return weight <= maxDistance
+
+
+# 进程池中各工作进程持有的语义图及共用数据
+_workerState = None
+
+
+def _initWorker(graph, mode, components, engine, cutoff):
+    global _workerState
+    _workerState = _componentState(graph, mode, components, engine, cutoff)
+
+
+def _workerTaskScores(task):
+    return _taskScores(_workerState, task)
+
+
+# compat方式全图共用的数据(均为顶点编号)：
+#   covers    各词语出现在哪些顶点中(包括自身)
+#   contained 各顶点中包含的按顶点判断的词语
+#   spanning  含有'-'或'>'、可能跨越路径分隔符匹配的词语及其文本，需按路径字符串的内容判断
+def _compatContext(graph):
+    vocab, index = graph.vocab, graph.index
+    covers = defaultdict(list)
+    for vertex, word in enumerate(vocab):
+        size = len(word)
+        parts = {word[i:j] for i in range(size) for j in range(i + 1, size + 1)}
+        for part in parts:
+            if part in index:
+                covers[index[part]].append(vertex)
+    spanning = [(i, word) for i, word in enumerate(vocab) if '-' in word or '>' in word]
+    spanningSet = set(i for i, _ in spanning)
+    contained = [[] for _ in vocab]
+    for word, vertices in covers.items():
+        if word not in spanningSet:
+            for vertex in vertices:
+                contained[vertex].append(word)
+    return covers, contained, spanning
+
+
+# 单个分量的compat数据，词语为全图编号，顶点为分量内编号：
+#   singles  分量内只有自身包含它的词语及其顶点，计数直接等于该顶点的子树规模
+#   multiple 其余出现在分量中的词语及分量内包含它的全部顶点(词语本身可以在其他分量中)
+def _componentContext(members, context):
+    covers, contained, spanning = context
+    local = {vertex: i for i, vertex in enumerate(members)}
+    singles, multiple = [], []
+    seen = set()
+    for vertex in members:
+        for word in contained[vertex]:
+            if word in seen:
+                continue
+            seen.add(word)
+            localCovers = [local[v] for v in covers[word] if v in local]
+            if word in local and localCovers == [local[word]]:
+                singles.append((word, local[word]))
+            else:
+                multiple.append((word, localCovers))
+    return singles, multiple, spanning, [contained[vertex] for vertex in members]
+
+
+# 累加单个源点的compat居间度，graph为分量子图，scores以全图词语编号为键，tree为该源点的最短路径树
+# 源点m的最短路径树中，终点k的路径包含词语w，当且仅当根到k的路径上存在包含w的顶点，
+# 因此计数等于包含w的最上层顶点的子树规模之和(w在源点中时为整棵树减去源点自身)
+def _addCompatSource(graph, source, context, scores, tree):
+    singles, multiple, spanning, contained = context
+    order, _, predecessor = tree
+    # 按标记顺序的逆序累加得到子树规模，不可达顶点为0
+    subtree = [0] * len(graph)
+    for vertex in order:
+        subtree[vertex] = 1
+    for vertex in reversed(order[1:]):
+        subtree[predecessor[vertex]] += subtree[vertex]
+
+    for word, vertex in singles:
+        scores[word] += subtree[vertex]
+    for word, covers in multiple:
+        marked = [vertex for vertex in covers if subtree[vertex]]
+        if not marked:
+            continue
+        if source in marked:
+            score = subtree[source]
+        else:
+            markedSet = set(marked)
+            score = 0
+            for vertex in marked:
+                # 只累加祖先中没有被标记顶点的子树
+                parent = predecessor[vertex]
+                while parent >= 0 and parent not in markedSet:
+                    parent = predecessor[parent]
+                if parent < 0:
+                    score += subtree[vertex]
+        scores[word] += score
+    # 终点不能是源点自身：源点中包含的词语各多计了一次
+    for word in contained[source]:
+        scores[word] -= 1
+
+    # 路径字符串S(k) = S(前驱) + '->' + k，含有target当且仅当S(前驱)含有target，
+    # 或target出现在S(前驱)末尾len(target)-1个字符与新增部分拼接的串中，
+    # 因此沿前驱关系只需保存每个顶点路径的末尾片段，不必拼出完整路径
+    vocab = graph.vocab
+    for word, target in spanning:
+        keep = len(target) - 1
+        found = {source: target in vocab[source]}
+        tails = {source: vocab[source][max(0, len(vocab[source]) - keep):]}
+        count = 0
+        for vertex in order[1:]:
+            parent = predecessor[vertex]
+            text = tails[parent] + '->' + vocab[vertex]
+            found[vertex] = found[parent] or target in text
+            tails[vertex] = text[max(0, len(text) - keep):]
+            count += found[vertex]
+        scores[word] += count
+
+
+# 累加单个源点的Brandes居间度，全部源点累加的复杂度为O(V·E + V²logV)
+def _addBrandesSource(source, dag, scores):
+    order, sigma, predecessors = dag
+    delta = [0.0] * len(scores)
+    # 按距离从远到近回溯累加依赖值
+    for vertex in reversed(order):
+        coefficient = (1 + delta[vertex]) / sigma[vertex]
+        for parent in predecessors[vertex]:
+            delta[parent] += sigma[parent] * coefficient
+        if vertex != source:
+            scores[vertex] += delta[vertex]
+
+
+# 抽样近似：只从k个枢纽源点计算最短路径，再按n/k外推全部源点的累加值
+APPROX_MIN_NODES = 1500  # 启用自动抽样时建议的顶点数阈值，getDensity默认不启用(approxMinNodes=None)
+APPROX_EPSILON = 0.1  # 归一化居间度的目标误差
+APPROX_DELTA = 0.1  # 误差超出目标的概率上限
+
+
+# 根据误差界确定枢纽源点个数
+# k >= ln(2n/δ)/(2ε²)时，各顶点归一化居间度的误差以不低于1-δ的概率小于ε(Hoeffding不等式与并集界)
+def pivotCount(nodeCount, epsilon=APPROX_EPSILON, delta=APPROX_DELTA):
+    if nodeCount == 0 or epsilon is None:
+        return nodeCount
+    k = math.ceil(math.log(2 * nodeCount / delta) / (2 * epsilon ** 2))
+    return min(nodeCount, k)
+
+
+# 抽取枢纽源点：random为简单随机抽样，stratified按顶点度数分为k层后每层抽取一个
+def samplePivots(graphDatas, k, seed=0, sampling='stratified'):
+    graph = WordGraph.fromDict(graphDatas)
+    nodes = list(range(len(graph)))
+    if k < len(nodes):
+        rng = random.Random(seed)
+        if sampling == 'random':
+            nodes = rng.sample(nodes, k)
+        elif sampling == 'stratified':
+            ranked = sorted(nodes, key=graph.degree)
+            nodes = [rng.choice(ranked[i * len(ranked) // k:(i + 1) * len(ranked) // k]) for i in range(k)]
+            # 打乱顺序，按时间预算提前停止时已处理的部分仍是随机样本
+            rng.shuffle(nodes)
+        else:
+            raise ValueError(f"未知的抽样方式: {sampling}")
+    return [graph.vocab[i] for i in nodes]
+
+
+# 抽样近似的居间度
+# 枢纽源点数由误差界epsilon/delta确定，给定timeBudget(秒)时在预计超时前停止，
+# seed固定时结果可复现；全部顶点都被选中时结果与getIntermediate相同；maxDistance、maxHops与getIntermediate相同
+def approximateIntermediate(graphDatas, mode=BC_COMPAT, epsilon=APPROX_EPSILON, delta=APPROX_DELTA,
+                            timeBudget=None, seed=0, sampling='stratified', stats=None, engine=ENGINE_HEAP,
+                            maxDistance=None, maxHops=None):
+    graph = WordGraph.fromDict(graphDatas)
+    nodeCount = len(graph)
+    if mode not in (BC_COMPAT, BC_BRANDES):
+        raise ValueError(f"未知的居间度计算方式: {mode}")
+    pivots = samplePivots(graph, pivotCount(nodeCount, epsilon, delta), seed, sampling)
+    # 各枢纽源点只在其所在的连通分量内计算
+    components = graph.components()
+    state = _componentState(graph, mode, components, engine, (maxDistance, maxHops))
+    location = {}
+    for index, members in enumerate(components):
+        for source, vertex in enumerate(members):
+            location[vertex] = (index, source)
+    scores = [0 if mode == BC_COMPAT else 0.0] * nodeCount
+
+    start = time.perf_counter()
+    processed = 0
+    for pivot in pivots:
+        if timeBudget is not None and processed:
+            elapsed = time.perf_counter() - start
+            # 按已处理源点的平均耗时预估，下一个源点会超出预算时停止
+            if elapsed + elapsed / processed > timeBudget:
+                break
+        index, source = location[graph.index[pivot]]
+        for word, score in _taskScores(state, (index, source, source + 1)).items():
+            scores[word] += score
+        processed += 1
+        progress_hook.reportProgress(progress_hook.PROGRESS_BETWEENNESS, processed, len(pivots))
+
+    if stats is not None:
+        stats['betweennessPivots'] = processed
+    if 0 < processed < nodeCount:
+        scale = nodeCount / processed
+        scores = [score * scale for score in scores]
+    return dict(zip(graph.vocab, scores))
+
+
+# 按语义图规模和时间预算选择居间度的计算策略：
+#   exact      精确计算全部源点
+#   sampled    抽样近似(approximateIntermediate)
+#   sparsified 先按k近邻稀疏化语义图(similarity.nearestEdges)，再在剩余时间内抽样近似
+STRATEGY_EXACT = 'exact'
+STRATEGY_SAMPLED = 'sampled'
+STRATEGY_SPARSIFIED = 'sparsified'
+# 估计代价时实测的源点个数：源点总数的PLAN_PROBE_FRACTION，不少于PLAN_MIN_PROBES、不多于PLAN_MAX_PROBES
+PLAN_PROBE_FRACTION = 0.02
+PLAN_MIN_PROBES = 20
+PLAN_MAX_PROBES = 200
+PLAN_TOP_K = 5  # sparsified策略中每个词语保留的近邻边数
+
+
+# 单个源点的代价与所在分量的顶点数+边数近似成正比，全部源点的工作量为各分量的 顶点数×(顶点数+边数) 之和
+def _componentWorkload(graph, components):
+    workload = 0
+    for members in components:
+        if len(members) > TINY_COMPONENT:
+            degrees = sum(graph.degree(v) for v in members)
+            workload += len(members) * (len(members) + degrees // 2)
+    return workload
+
+
+# 实测部分源点的耗时，返回单位工作量的秒数，没有需要计算的源点时返回0
+# probes为实测的源点个数，None表示按PLAN_PROBE_FRACTION等参数确定；
+# 分量的子图等数据在计时前构建，这部分是一次性的开销，不随源点个数增长
+def unitCost(graph, mode=BC_COMPAT, engine=ENGINE_HEAP, maxDistance=None, maxHops=None,
+             probes=None, seed=0):
+    components = graph.components()
+    state = _componentState(graph, mode, components, engine, (maxDistance, maxHops))
+    sources = [(index, source, len(members) + sum(graph.degree(v) for v in members) // 2)
+               for index, members in enumerate(components) if len(members) > TINY_COMPONENT
+               for source in range(len(members))]
+    if not sources:
+        return 0.0
+    if probes is None:
+        probes = min(PLAN_MAX_PROBES, max(PLAN_MIN_PROBES, math.ceil(len(sources) * PLAN_PROBE_FRACTION)))
+    sources = random.Random(seed).sample(sources, min(probes, len(sources)))
+    for index in {index for index, _, _ in sources}:
+        _componentPart(state, index)
+    start = time.perf_counter()
+    for index, source, _ in sources:
+        _taskScores(state, (index, source, source + 1))
+    return (time.perf_counter() - start) / sum(units for _, _, units in sources)
+
+
+# 估计各策略的耗时，选出在timeBudget(秒)内能完成的最精确的策略
+# approxMinNodes与getDensity的同名参数相同：给定时顶点数超过该值不使用精确计算，默认None不限制；
+# workers>1时按进程数折算精确计算的耗时
+# 返回{'strategy': 策略, 'estimatedSeconds': 预计耗时}
+def planCentrality(graphDatas, timeBudget, mode=BC_COMPAT, approxMinNodes=None, approxOptions=None,
+                   workers=1, engine=ENGINE_HEAP, maxDistance=None, maxHops=None):
+    graph = WordGraph.fromDict(graphDatas)
+    if timeBudget <= 0:
+        # 建图已用完预算，不再实测代价
+        return {'strategy': STRATEGY_SPARSIFIED, 'estimatedSeconds': 0.0}
+    unit = unitCost(graph, mode, engine, maxDistance, maxHops)
+    exact = unit * _componentWorkload(graph, graph.components())
+    options = approxOptions or {}
+    pivots = pivotCount(len(graph), options.get('epsilon', APPROX_EPSILON), options.get('delta', APPROX_DELTA))
+    sampled = exact * pivots / len(graph) if len(graph) else 0.0
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if approxMinNodes is None or len(graph) <= approxMinNodes:
+        parallel = exact / workers if workers > 1 and len(graph) >= PARALLEL_MIN_NODES else exact
+        if parallel <= timeBudget:
+            return {'strategy': STRATEGY_EXACT, 'estimatedSeconds': parallel}
+    if sampled <= timeBudget:
+        return {'strategy': STRATEGY_SAMPLED, 'estimatedSeconds': sampled}
+    sparse = WordGraph.fromDict(similarity.nearestEdges(graph.toDict(), PLAN_TOP_K))
+    estimate = unit * _componentWorkload(sparse, sparse.components()) * pivots / len(graph)
+    return {'strategy': STRATEGY_SPARSIFIED, 'estimatedSeconds': min(estimate, timeBudget)}
+
+
+# 原实现：保存全部顶点对的路径字符串后逐个词语扫描，保留用于对照和性能测试
+def getIntermediateByPaths(graphDatas):
     # 获取最短路径数据集合
     shortestDatas = {}
     for key in graphDatas.keys():
@@ -37,12 +492,102 @@ def getIntermediate(graphDatas):
 
     return interval
 
-def getDensity(wordsData):
-    simData, missingWord = similarity.calculationSim(wordsData)
-    graphDatas = similarity.getGraph(wordsData, simData)
-    interval = getIntermediate(graphDatas)
+# 区间划分个数s的搜索方式：
+#   geometric 原实现，从s开始每次乘以c，直到最大居间度密度小于d或达到最大次数
+#   bisect    在s与几何增长的最大值之间二分，找到使最大居间度密度小于d的较小的s
+REFINE_GEOMETRIC = 'geometric'
+REFINE_BISECT = 'bisect'
+BISECT_STEPS = 16  # 二分的最多次数，区间缩小到1以内时提前结束
+
+
+def _resetPeakRss():
+    """重置进程常驻内存的峰值(VmHWM)，之后读到的峰值只反映本阶段；只在Linux上可用，失败时返回False"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _readRss():
+    """读取进程当前及重置以来的常驻内存峰值(VmRSS, VmHWM)，单位为字节，不可用时返回(None, None)"""
+    values = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    name, value = line.split(':', 1)
+                    values[name] = int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        pass
+    return values.get('VmRSS'), values.get('VmHWM')
+
+
+def getDensity(wordsData, simCache=None, simStore=None, stats=None, mode=BC_COMPAT,
+               approxMinNodes=None, approxOptions=None, workers=1, refine=REFINE_GEOMETRIC,
+               engine=ENGINE_HEAP, maxDistance=None, maxHops=None, minSim=similarity.GRAPH_MIN_SIM, topK=None,
+               timeBudget=None, traceMemory=False):
+    # simCache为会话内的编码对缓存，simStore为持久化的词语对相似度存储，mode为居间度计算方式
+    # 语义图顶点数超过approxMinNodes时改用抽样近似(默认None，始终精确计算)，approxOptions为近似计算的参数
+    # workers为精确计算居间度时的进程数，refine为区间划分个数的搜索方式，engine为最短路径的计算方式
+    # maxDistance、maxHops为居间度计算时最短路径的搜索半径，None表示不限制
+    # minSim为建图的相似度阈值(None表示不按阈值过滤)，topK不为None时每个词语只保留相似度最高的topK条边
+    # timeBudget为整个语义阶段的时间预算(秒)，给定时由planCentrality按建图后剩余的时间选择居间度的计算策略
+    # 传入stats字典时记录语义图规模、度分布、建图阶段的常驻内存峰值(只在Linux上可用，否则为None)及所选策略
+    # traceMemory为True时另用tracemalloc记录建图阶段Python内存分配的峰值，建图会慢数倍，只用于排查内存问题
+    startTime = time.perf_counter()
+    tracing = traceMemory and stats is not None and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    measuring = stats is not None and _resetPeakRss()
+    if measuring:
+        stats['graphStartRss'] = _readRss()[0]
+    # 相似度计算与建图融合进行，超过阈值的边直接写入邻接表
+    graphDatas, missingWord = similarity.buildGraph(wordsData, simCache=simCache, simStore=simStore,
+                                                    minSim=minSim, topK=topK)
+    if stats is not None:
+        stats['candidateCount'] = len(wordsData)
+        stats['missingCount'] = len(missingWord)
+        stats['nodeCount'] = len(graphDatas)
+        stats['edgeCount'] = graphDatas.edgeCount()
+        stats['degree'] = graphDatas.degreeStats()
+        componentSizes = sorted(len(members) for members in graphDatas.components())
+        stats['componentCount'] = len(componentSizes)
+        stats['largestComponent'] = componentSizes[-1] if componentSizes else 0
+        if measuring:
+            stats['graphPeakRss'] = _readRss()[1]
+        else:
+            stats['graphStartRss'] = stats['graphPeakRss'] = None
+        if traceMemory and tracemalloc.is_tracing():
+            stats['graphPeakMemory'] = tracemalloc.get_traced_memory()[1]
+        if tracing:
+            tracemalloc.stop()
+    if timeBudget is not None:
+        remaining = timeBudget - (time.perf_counter() - startTime)
+        plan = planCentrality(graphDatas, remaining, mode, approxMinNodes, approxOptions, workers, engine,
+                              maxDistance, maxHops)
+    elif approxMinNodes is not None and len(graphDatas) > approxMinNodes:
+        plan = {'strategy': STRATEGY_SAMPLED, 'estimatedSeconds': None}
+    else:
+        plan = {'strategy': STRATEGY_EXACT, 'estimatedSeconds': None}
+    if plan['strategy'] == STRATEGY_EXACT:
+        interval = getIntermediate(graphDatas, mode, workers, engine, maxDistance, maxHops)
+    else:
+        if plan['strategy'] == STRATEGY_SPARSIFIED:
+            graphDatas = WordGraph.fromDict(similarity.nearestEdges(graphDatas.toDict(), PLAN_TOP_K))
+        options = dict(approxOptions or {})
+        if timeBudget is not None:
+            # 抽样在剩余时间内停止，至少计算一个源点
+            options.setdefault('timeBudget', timeBudget - (time.perf_counter() - startTime))
+        interval = approximateIntermediate(graphDatas, mode, stats=stats, engine=engine, maxDistance=maxDistance,
+                                           maxHops=maxHops, **options)
+    if stats is not None:
+        stats['strategy'] = plan['strategy']
+        stats['estimatedSeconds'] = plan['estimatedSeconds']
+        stats['timeBudget'] = timeBudget
+        stats['semanticSeconds'] = time.perf_counter() - startTime
 
-    wordCount = len(interval)    # 节点个数
     s = 12  # 增加初始区间个数
     c = 1.8   # 调整区间增长速度
     d = 0.15     # 调整区间密度阈值
@@ -50,15 +595,88 @@ def getDensity(wordsData):
 
     # 按照键值排序（降序）
     sortedInterval = sorted(interval.items(), key=lambda asd: asd[1], reverse=True)
-    # 获取当前居间度密度最大值
-    maxratio, intervalDensity = refinementBC(sortedInterval, s)
-
-    # 设定循环次数
-    loop = 1
-    while maxratio >= d and loop < max:
-        s = s * c
-        maxratio, intervalDensity = refinementBC(sortedInterval, s)
-        loop += 1
+    if _loadNumpy() is not None:
+        return densityByArray(sortedInterval, s, c, d, max, refine)
+    return densityByStrings(sortedInterval, s, c, d, max, refine)
+
+
+# 搜索区间划分个数，ratioAt(s)返回(最大居间度密度, 该划分的结果)，返回最终选定划分的结果
+def searchIntervalCount(ratioAt, s, c, d, maxLoop, refine=REFINE_GEOMETRIC):
+    maxratio, result = ratioAt(s)
+    if refine == REFINE_GEOMETRIC:
+        loop = 1
+        while maxratio >= d and loop < maxLoop:
+            s = s * c
+            maxratio, result = ratioAt(s)
+            loop += 1
+        return result
+    if refine != REFINE_BISECT:
+        raise ValueError(f"未知的区间搜索方式: {refine}")
+
+    if maxratio < d:
+        return result
+    low, high = s, s
+    for _ in range(maxLoop - 1):
+        high = high * c
+    maxratio, result = ratioAt(high)
+    if maxratio >= d:
+        return result
+    # 保持ratioAt(low) >= d且ratioAt(high) < d
+    for _ in range(BISECT_STEPS):
+        if high - low < 1:
+            break
+        middle = (low + high) / 2
+        maxratio, middleResult = ratioAt(middle)
+        if maxratio >= d:
+            low = middle
+        else:
+            high, result = middle, middleResult
+    return result
+
+
+# 在居间度数组上划分区间：词语保持降序排列，只记录各词语的区间编号和各区间的词语个数
+def densityByArray(sortedInterval, s, c, d, maxLoop, refine=REFINE_GEOMETRIC):
+    np = _loadNumpy()
+    if np is None:
+        # 没有NumPy时按字符串划分，结果相同
+        return densityByStrings(sortedInterval, s, c, d, maxLoop, refine)
+    wordCount = len(sortedInterval)
+    maxIntermediaryDegree = sortedInterval[0][1]
+    minIntermediaryDegree = sortedInterval[wordCount - 1][1]
+    words = [key for key, _ in sortedInterval]
+    offsets = np.array([score for _, score in sortedInterval], dtype=np.float64) - minIntermediaryDegree
+    # 原实现用逗号拼接词语，含逗号的词语会被拆开计数
+    pieces = None
+    if any(',' in word for word in words):
+        pieces = np.array([word.count(',') + 1 for word in words], dtype=np.float64)
+
+    def ratioAt(s):
+        intervalScore = (maxIntermediaryDegree - minIntermediaryDegree) / s
+        if intervalScore == 0:
+            raise ZeroDivisionError('float division by zero')
+        flags = (offsets / intervalScore).astype(np.int64)
+        counts = np.bincount(flags, weights=pieces).astype(np.int64)
+        return int(counts.max()) / wordCount, (flags, counts)
+
+    flags, counts = searchIntervalCount(ratioAt, s, c, d, maxLoop, refine)
+
+    # 根据区间词语个数计算各词语的居间度密度，与原实现的词语顺序一致
+    intermediaryDensity = defaultdict(float)
+    densities = {}
+    for word, flag in zip(words, flags.tolist()):
+        density = densities.get(flag)
+        if density is None:
+            # 使用对数函数使密度分布更均匀
+            density = densities[flag] = math.log(int(counts[flag]) + 1) / math.log(wordCount + 1)
+        for part in (word.split(',') if pieces is not None else (word,)):
+            intermediaryDensity[part] = density
+    return intermediaryDensity
+
+
+# 原实现：以逗号拼接的字符串记录各区间的词语，NumPy不可用时使用
+def densityByStrings(sortedInterval, s, c, d, maxLoop, refine=REFINE_GEOMETRIC):
+    wordCount = len(sortedInterval)    # 节点个数
+    intervalDensity = searchIntervalCount(lambda s: refinementBC(sortedInterval, s), s, c, d, maxLoop, refine)
 
     # 根据获取到的居间度密度集合进行相应的单词的居间度密度集合更新
     intermediaryDensity = defaultdict(float)
@@ -0,0 +1,51 @@
+import os
+
+# 获取当前文件所在目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+stop_words_path = os.path.join(current_dir, 'dict_file', 'stop_words.txt')
+
+# 词性过滤(保留形容词、副形词、名形词、成语、简称略语、习用语、动词、动语素、副动词、名动词、名词、地名、音译地名、机构团体名、其他专名)
+ALLOW_SPEECH_TAGS = frozenset(['a', 'ad', 'an', 'i', 'j', 'l', 'v', 'vg', 'vd', 'vn', 'n', 'ns', 'nsf', 'nt', 'nz'])
+# 不参与前后继关系统计的词性(非语素字、标点)
+NOT_ALLOW_TAGS = frozenset(['x', 'w'])
+
+# 词性权重，未列出的词性权重为0
+FLAG_WEIGHTS = {
+    'n': 1.2,  # 提高普通名词权重
+    'j': 0.6,  # 降低简称略语权重
+    'nr': 1.5,  # 提高人名权重
+    'ns': 1.3,  # 提高地名权重
+    'nsf': 1.3,  # 提高音译地名权重
+    'nt': 1.4,  # 提高机构团体名权重
+    'nz': 1.4,  # 提高其他专名权重
+    'an': 0.4,  # 降低名形词权重
+    'l': 0.4,  # 降低习用语权重
+    'vn': 0.6,  # 提高名动词权重
+    'i': 0.3,  # 降低成语权重
+    'a': 0.3,  # 降低形容词权重
+    'vd': 0.3,  # 降低副动词权重
+    'ad': 0.2,  # 降低副形词权重
+    'v': 0.2,  # 降低动词权重
+    'vg': 0.2,  # 降低动语素权重
+}
+
+# 进程内共享的停用词集合，首次使用时加载
+_stopWords = None
+
+
+def stop_words():
+    """停用词集合(frozenset)，在本进程中只读取一次stop_words.txt，文件不存在或读取失败时为空集合"""
+    global _stopWords
+    if _stopWords is None:
+        words = frozenset()
+        try:
+            if os.path.exists(stop_words_path):
+                with open(stop_words_path, 'r', encoding='utf-8') as f:
+                    words = frozenset(line.strip() for line in f)
+                print(f"已加载 {len(words)} 个停用词")
+            else:
+                print(f"停用词文件不存在: {stop_words_path}")
+        except Exception as e:
+            print(f"加载停用词时出错: {str(e)}")
+        _stopWords = words
+    return _stopWords
@@ -13,6 +13,7 @@ from PyQt5.QtGui import QFont, QPalette, QColor
 from PyQt5.QtCore import *
 from PyQt5.QtWidgets import *
 import file_processor
+import progress_hook
 
 
 
@@ -418,5 +419,7 @@ class Example(QWidget):
 if __name__ == '__main__':
     # 创建应用程序和对象
     app = QApplication(sys.argv)
+    # 核心模块不依赖Qt，相似度计算、建图和居间度计算时通过进度回调处理界面事件
+    progress_hook.setProgressCallback(lambda stage, done, total: QApplication.processEvents())
     ex = Example()
     sys.exit(app.exec_())
\ No newline at end of file
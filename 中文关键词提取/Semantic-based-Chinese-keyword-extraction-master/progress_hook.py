@@ -0,0 +1,22 @@
+# 长时间计算中定期调用的进度回调callback(stage, done, total)，默认不回调；
+# 核心模块不依赖界面库，GUI可在回调中调用QApplication.processEvents()保持界面响应
+
+# 阶段名称，作为进度回调的第一个参数
+PROGRESS_SIMILARITY = 'similarity'
+PROGRESS_GRAPH = 'graph'
+PROGRESS_BETWEENNESS = 'betweenness'
+
+_progressCallback = None
+
+
+def setProgressCallback(callback):
+    """设置进度回调，传入None取消，返回之前的回调"""
+    global _progressCallback
+    previous, _progressCallback = _progressCallback, callback
+    return previous
+
+
+def reportProgress(stage, done, total):
+    """stage阶段已完成total中的done个单位(行、源点或任务)"""
+    if _progressCallback is not None:
+        _progressCallback(stage, done, total)
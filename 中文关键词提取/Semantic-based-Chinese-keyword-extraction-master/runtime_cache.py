@@ -0,0 +1,32 @@
+import hashlib
+import os
+
+# 获取当前文件所在目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# 缓存目录可通过环境变量指定，便于多个工作进程共享同一份缓存
+CACHE_DIR_ENV = 'KEYWORDS_CACHE_DIR'
+
+
+def get_cache_dir():
+    """获取运行时缓存目录，不存在时自动创建"""
+    cache_dir = os.environ.get(CACHE_DIR_ENV) or os.path.join(current_dir, 'cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def file_hash(path):
+    """计算文件内容的sha256摘要，用于判断缓存是否失效"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def atomic_write(path, data):
+    """先写临时文件再替换，避免并发进程读到写了一半的缓存"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
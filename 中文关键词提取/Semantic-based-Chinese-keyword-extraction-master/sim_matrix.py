@@ -0,0 +1,137 @@
+import math
+
+import numpy as np
+
+import cilin_store
+
+# 共享1~4层时余弦公式的系数
+LEVEL_WEIGHT = np.array([0.0, 0.65, 0.8, 0.85, 0.9, 0.0, 0.0])
+FLAG_AT = ord('@')
+FLAG_SHARP = ord('#')
+FLAG_EQUAL = ord('=')
+# 每个分块中编码对的最大数量，限制中间数组的内存占用(每个编码对的中间数组约占用80字节)
+BLOCK_PAIRS = 1 << 18
+
+_codeInfo = {}
+_cosTable = np.zeros(0)
+
+
+def _getCosTable(maxN):
+    """cos(n°)查找表，使用math.cos计算以保证与逐对计算的结果逐位一致"""
+    global _cosTable
+    if len(_cosTable) <= maxN:
+        _cosTable = np.array([math.cos(n * math.pi / 180) for n in range(maxN + 1)])
+    return _cosTable
+
+
+def _encodeWords(wordCodes, cilinIndex):
+    """将各词语的编码展开为分层整数数组、各层前缀计数及每个词语的起始位置"""
+    levels, counts, starts = [], [], []
+    for codes in wordCodes:
+        starts.append(len(levels))
+        for code in codes:
+            info = _codeInfo.get(code)
+            if info is None:
+                info = (cilin_store.encode_code(code),
+                        tuple(cilinIndex.prefixCount.get(code[:end], 0)
+                              for start, end in cilin_store.LEVEL_SLICES))
+                _codeInfo[code] = info
+            levels.append(info[0])
+            counts.append(info[1])
+    levels = np.array(levels, dtype=np.int16).reshape(-1, cilin_store.LEVELS)
+    counts = np.array(counts, dtype=np.int64).reshape(-1, cilin_store.LEVELS)
+    return levels, counts, np.array(starts, dtype=np.intp)
+
+
+def _codePairSim(levelsA, countsA, levelsB):
+    """批量计算编码对的相似度，公式与similarity.simByCilin相同"""
+    eq = levelsA[:, None, :] == levelsB[None, :, :]
+    # 从第一层开始连续相同的层数，按层展开的中间数组只使用uint8，之后的数组每个编码对只保留一个值
+    lv = np.cumprod(eq, axis=2, dtype=np.uint8).sum(axis=2, dtype=np.intp)
+    lvIndex = np.minimum(lv, cilin_store.LEVELS - 1)[..., None]
+
+    # broadcast_to不复制数据，只取出第一个不同层的编码计算差值
+    shape = eq.shape
+    k = np.abs(np.take_along_axis(np.broadcast_to(levelsA[:, None, :], shape), lvIndex, axis=2)[..., 0]
+               - np.take_along_axis(np.broadcast_to(levelsB[None, :, :], shape), lvIndex, axis=2)[..., 0])
+    k[lv >= 5] = 0
+    n = np.take_along_axis(np.broadcast_to(countsA[:, None, :], shape),
+                           np.maximum(lv - 1, 0)[..., None], axis=2)[..., 0]
+    n = np.where(lv == 0, 1, n)
+
+    cosTable = _getCosTable(int(n.max()) if n.size else 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sim = LEVEL_WEIGHT[lv] * cosTable[n] * ((n - k + 1) / n)
+
+    flagA = levelsA[:, None, 5]
+    flagB = levelsB[None, :, 5]
+    same = lv == 6
+    sim = np.where(same & (flagA == FLAG_SHARP), 0.9, sim)
+    sim = np.where(same & (flagA == FLAG_EQUAL), 1.0, sim)
+    sim = np.where((lv == 5) | (same & (flagA != FLAG_SHARP) & (flagA != FLAG_EQUAL)), 0.1, sim)
+    sim = np.where((flagA == FLAG_AT) | (flagB == FLAG_AT) | (lv == 0), 0.1, sim)
+    return sim
+
+
+def simMatrix(wordCodesA, wordCodesB, cilinIndex):
+    """计算两组词语之间的词林相似度矩阵
+
+    wordCodesA、wordCodesB为各词语的编码列表（均不能为空），
+    返回len(wordCodesA)×len(wordCodesB)的float64矩阵，与simByCilin逐对计算的结果相等
+    """
+    levelsA, countsA, startsA = _encodeWords(wordCodesA, cilinIndex)
+    levelsB, countsB, startsB = _encodeWords(wordCodesB, cilinIndex)
+    result = np.zeros((len(wordCodesA), len(wordCodesB)))
+    if len(wordCodesA) == 0 or len(wordCodesB) == 0:
+        return result
+
+    endsA = np.append(startsA[1:], len(levelsA))
+    blockCodes = max(1, BLOCK_PAIRS // len(levelsB))
+    first = 0
+    while first < len(wordCodesA):
+        # 分块按词语边界切分，保证同一词语的编码在同一块中
+        last = int(np.searchsorted(endsA, startsA[first] + blockCodes, side='right'))
+        last = max(last, first + 1)
+        codeStart, codeEnd = startsA[first], endsA[last - 1]
+        sim = _codePairSim(levelsA[codeStart:codeEnd], countsA[codeStart:codeEnd], levelsB)
+        # 对每个词语对取所有编码对中的最大值
+        sim = np.maximum.reduceat(sim, startsB, axis=1)
+        sim = np.maximum.reduceat(sim, startsA[first:last] - codeStart, axis=0)
+        result[first:last] = sim
+        first = last
+    # simByCilin的初始最大值为0
+    return np.maximum(result, 0)
+
+
+def iterSymmetricBlocks(wordCodes, cilinIndex):
+    """按行块逐块计算上三角部分的相似度，依次产出(first, last, block)
+
+    block为第first~last-1个词语与第first个及其后所有词语的相似度，
+    调用方可以直接处理各块而无需保存完整矩阵
+    """
+    levels, counts, starts = _encodeWords(wordCodes, cilinIndex)
+    size = len(wordCodes)
+    ends = np.append(starts[1:], len(levels))
+    first = 0
+    while first < size:
+        # 当前行块只需与自身及其后的词语计算
+        remaining = len(levels) - starts[first]
+        blockCodes = max(1, BLOCK_PAIRS // remaining)
+        last = int(np.searchsorted(ends, starts[first] + blockCodes, side='right'))
+        last = max(last, first + 1)
+        codeStart, codeEnd = starts[first], ends[last - 1]
+        sim = _codePairSim(levels[codeStart:codeEnd], counts[codeStart:codeEnd], levels[codeStart:])
+        sim = np.maximum.reduceat(sim, starts[first:] - codeStart, axis=1)
+        sim = np.maximum.reduceat(sim, starts[first:last] - codeStart, axis=0)
+        yield first, last, np.maximum(sim, 0)
+        first = last
+
+
+def symmetricSimMatrix(wordCodes, cilinIndex):
+    """计算一组词语两两之间的相似度矩阵，只计算上三角部分并镜像到下三角"""
+    size = len(wordCodes)
+    result = np.zeros((size, size))
+    for first, last, sim in iterSymmetricBlocks(wordCodes, cilinIndex):
+        result[first:last, first:] = sim
+        result[first:, first:last] = sim.T
+    return result
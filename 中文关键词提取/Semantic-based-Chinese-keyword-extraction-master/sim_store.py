@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import time
+
+import runtime_cache
+
+STORE_NAME = 'word_sim.sqlite'
+# 记录数超出上限的比例达到该值时才淘汰，淘汰需要按使用时间排序，不在每篇文档后执行
+EVICT_SLACK = 0.05
+# 内存中累积的命中记录达到该数量时写回使用时间
+FLUSH_HITS = 100000
+
+
+class SimStore:
+    """持久化的词语对相似度存储（SQLite）
+
+    重启后仍然有效；超过maxRows条记录时按最近使用时间淘汰，
+    词林文件的哈希变化时清空全部记录。
+    记录数只在打开时统计一次，之后按写入的条数累加；命中记录的使用时间先保存在内存中，
+    与淘汰一起批量写回，记录数超出上限EVICT_SLACK以上或关闭存储时才执行淘汰
+    """
+
+    def __init__(self, cilinHash, path=None, maxRows=2000000):
+        self.path = path or os.path.join(runtime_cache.get_cache_dir(), STORE_NAME)
+        self.maxRows = maxRows
+        self.hits = 0
+        self.writes = 0
+        self._touched = {}  # 尚未写回的命中记录 {(词语1, 词语2): 使用时间}
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS pairs (
+                w1 TEXT NOT NULL, w2 TEXT NOT NULL, sim REAL NOT NULL, used REAL NOT NULL,
+                PRIMARY KEY (w1, w2)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS pairs_used ON pairs (used);
+            CREATE TEMP TABLE IF NOT EXISTS doc_words (w TEXT PRIMARY KEY);
+        ''')
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'cilin_hash'").fetchone()
+        if row is None or row[0] != cilinHash:
+            if row is not None:
+                print("词林文件已变化，清空词语相似度存储")
+            with self._conn:
+                self._conn.execute("DELETE FROM pairs")
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('cilin_hash', ?)", (cilinHash,))
+        self.rowCount = self._conn.execute("SELECT COUNT(*) FROM pairs").fetchone()[0]
+
+    def lookup(self, words):
+        """读取给定词语之间已存储的相似度，返回对称的{词语: {词语: 相似度}}字典"""
+        known = {}
+        # doc_words是临时表，写入它不会锁定相似度存储
+        with self._conn:
+            self._conn.execute("DELETE FROM doc_words")
+            self._conn.executemany("INSERT OR IGNORE INTO doc_words VALUES (?)", ((w,) for w in words))
+            rows = self._conn.execute('''
+                SELECT w1, w2, sim FROM pairs
+                WHERE w1 IN (SELECT w FROM doc_words) AND w2 IN (SELECT w FROM doc_words)
+            ''').fetchall()
+        # 命中的记录稍后刷新使用时间，避免被淘汰
+        now = time.time()
+        for w1, w2, sim in rows:
+            known.setdefault(w1, {})[w2] = sim
+            known.setdefault(w2, {})[w1] = sim
+            self._touched[(w1, w2)] = now
+        self.hits += len(rows)
+        if len(self._touched) >= FLUSH_HITS:
+            with self._conn:
+                self._flushTouched()
+        return known
+
+    def save(self, pairs):
+        """写入新计算的词语对相似度，pairs为(词语1, 词语2, 相似度)的列表"""
+        if not pairs:
+            return
+        now = time.time()
+        with self._conn:
+            changes = self._conn.total_changes
+            # 词林不变时同一词语对的相似度不变，其他进程已写入的记录直接保留
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO pairs VALUES (?, ?, ?, ?)",
+                ((w1, w2, sim, now) if w1 <= w2 else (w2, w1, sim, now) for w1, w2, sim in pairs))
+            self.writes += len(pairs)
+            self.rowCount += self._conn.total_changes - changes
+            if self.rowCount > self.maxRows * (1 + EVICT_SLACK):
+                self._evict()
+
+    def _flushTouched(self):
+        """写回命中记录的使用时间，需在事务中调用"""
+        if self._touched:
+            self._conn.executemany("UPDATE pairs SET used = ? WHERE w1 = ? AND w2 = ?",
+                                   ((used, w1, w2) for (w1, w2), used in self._touched.items()))
+            self._touched = {}
+
+    def _evict(self):
+        """按最近使用时间淘汰超出maxRows的记录，需在事务中调用
+
+        淘汰前重新统计记录数，同时校正其他进程写入造成的偏差
+        """
+        self._flushTouched()
+        self.rowCount = self._conn.execute("SELECT COUNT(*) FROM pairs").fetchone()[0]
+        excess = self.rowCount - self.maxRows
+        if excess > 0:
+            self._conn.execute('''
+                DELETE FROM pairs WHERE (w1, w2) IN
+                (SELECT w1, w2 FROM pairs ORDER BY used LIMIT ?)
+            ''', (excess,))
+            self.rowCount -= excess
+
+    def stats(self):
+        """返回读写统计"""
+        return {'hits': self.hits, 'writes': self.writes, 'rows': self.rowCount}
+
+    def close(self):
+        """写回使用时间并淘汰超出上限的记录后关闭，可重复调用"""
+        if self._conn is None:
+            return
+        try:
+            with self._conn:
+                if self.rowCount > self.maxRows:
+                    self._evict()
+                else:
+                    self._flushTouched()
+        finally:
+            self._conn.close()
+            self._conn = None
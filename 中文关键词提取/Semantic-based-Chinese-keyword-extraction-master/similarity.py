@@ -1,16 +1,33 @@
+import heapq
 import math
 import sys
 import os
-from PyQt5.QtGui import QFont
-from PyQt5.QtCore import *
-from PyQt5.QtWidgets import *
+from collections import defaultdict, OrderedDict
+import cilin_store
+import progress_hook
+from word_graph import WordGraph
+
+# 候选词数量达到该值时，'auto'方式改用向量化计算
+VECTOR_MIN_WORDS = 200
+# 构建语义图时边的相似度阈值
+GRAPH_MIN_SIM = 0.4
+# 公共编码长度对应的余弦公式系数
+LEVEL_WEIGHTS = {1: 0.65, 2: 0.8, 4: 0.85, 5: 0.9}
+# 阶段名称，作为进度回调的第一个参数
+PROGRESS_SIMILARITY = progress_hook.PROGRESS_SIMILARITY
+PROGRESS_GRAPH = progress_hook.PROGRESS_GRAPH
 
 # 获取当前文件所在目录
 current_dir = os.path.dirname(os.path.abspath(__file__))
+cilinPath = os.path.join(current_dir, 'dict_file', 'cilin.txt')
+
+# 进程内共享的词林索引，首次使用时构建
+_cilinIndex = None
+# 向量化计算模块sim_matrix，首次使用时导入(导入NumPy约需0.1秒)，False表示尚未尝试导入
+_simMatrix = False
 
 def cilin():
     try:
-        cilinPath = os.path.join(current_dir, 'dict_file', 'cilin.txt')
         if not os.path.exists(cilinPath):
             print(f"错误: 同义词库文件不存在: {cilinPath}")
             return {}
@@ -50,6 +67,54 @@ def cilin():
         return {}
 
 
+class CilinIndex:
+    """同义词词林索引：保存编码->词语的原始数据，建立词语->编码的倒排表和编码前缀计数表"""
+
+    def __init__(self, cilinData):
+        self.cilinData = cilinData
+        self.wordCodes = {}
+        # 记录以各前缀开头的编码个数，供getN直接查表
+        self.prefixCount = defaultdict(int)
+        for code, words in cilinData.items():
+            # 同一行内重复出现的词语只记录一次编码
+            for word in dict.fromkeys(words):
+                self.wordCodes.setdefault(word, []).append(code)
+            for i in range(1, len(code) + 1):
+                self.prefixCount[code[:i]] += 1
+
+    def getCodes(self, word):
+        """获取词语在词林中的全部编码，词林中缺失时返回空列表"""
+        return self.wordCodes.get(word, [])
+
+
+def getSimMatrix():
+    """NumPy可用时返回向量化的相似度矩阵计算模块sim_matrix，否则返回None，每个进程只导入一次"""
+    global _simMatrix
+    if _simMatrix is False:
+        try:
+            import sim_matrix
+            _simMatrix = sim_matrix
+        except ImportError:
+            _simMatrix = None
+    return _simMatrix
+
+
+def getCilinIndex():
+    """获取词林索引，每个进程只加载一次
+
+    优先使用内存映射的二进制词林，多个进程共享同一份页缓存；
+    二进制词林不可用时退回到解析文本词林
+    """
+    global _cilinIndex
+    if _cilinIndex is None:
+        try:
+            _cilinIndex = cilin_store.load(cilinPath, cilin)
+        except Exception as e:
+            print(f"加载二进制词林失败: {str(e)}，改用文本词林")
+            _cilinIndex = CilinIndex(cilin())
+    return _cilinIndex
+
+
 def getSameCode(code1, code2):
     i = 0
     str = ""
@@ -73,94 +138,354 @@ def getK(code1, code2, length):
     return k
 
 
-def getN(sameCode, cilinData):
+def getN(sameCode, prefixCount):
     if len(sameCode) == 0:
         return 0
-    i = 0
-    for str in cilinData.keys():
-        if str.startswith(sameCode) == 1:
-            i += 1
-    return i
+    return prefixCount.get(sameCode, 0)
+
+
+def levelSim(length, n, k):
+    """公共编码长度为1、2、4、5时的相似度，n为公共前缀下的编码数，k为下一层的差值"""
+    return LEVEL_WEIGHTS[length] * math.cos(n * math.pi / 180) * ((n - k + 1) / n)
 
 
-def simByCilin(word1Code, word2Code, cilinData):
+def simByCode(code1, code2, cilinIndex):
+    """计算两个词林编码之间的相似度"""
+    sameCode = getSameCode(code1, code2)
+    length = len(sameCode)
+    k = getK(code1, code2, length)
+    n = getN(sameCode, cilinIndex.prefixCount)
+    if code1[-1] == '@' or code2[-1] == '@' or length == 0:
+        sim = 0.1
+    elif length in LEVEL_WEIGHTS:
+        sim = levelSim(length, n, k)
+    elif length == 8 and sameCode[-1] == '#':
+        sim = 0.9
+    elif length == 8 and sameCode[-1] == '=':
+        sim = 1
+    else:
+        sim = 0.1
+    return sim
+
+
+class CodeSimCache:
+    """按编码对缓存相似度的有界LRU缓存，可在同一会话的多个文档之间共享"""
+
+    def __init__(self, maxsize=200000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, code1, code2, cilinIndex):
+        """获取编码对的相似度，未命中时计算并写入缓存"""
+        # 相似度是对称的，编码对按字典序存储
+        key = (code1, code2) if code1 <= code2 else (code2, code1)
+        sim = self._data.get(key)
+        if sim is not None:
+            self.hits += 1
+            self._data.move_to_end(key)
+            return sim
+        self.misses += 1
+        sim = simByCode(code1, code2, cilinIndex)
+        self._data[key] = sim
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return sim
+
+    def stats(self):
+        """返回缓存命中统计"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': self.hits / total if total else 0.0,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def simByCilin(word1Code, word2Code, cilinIndex, simCache=None):
     maxSim = 0
     if len(word1Code) == 0 or len(word2Code) == 0:
         return maxSim
     for code1 in word1Code:
         for code2 in word2Code:
-            sameCode = getSameCode(code1, code2)
-            length = len(sameCode)
-            k = getK(code1, code2, length)
-            n = getN(sameCode, cilinData)
-            if code1[-1] == '@' or code2[-1] == '@' or length == 0:
-                sim = 0.1
-            elif length == 1:
-                sim = 0.65 * math.cos(n * math.pi / 180) * ((n - k + 1) / n)
-            elif length == 2:
-                sim = 0.8 * math.cos(n * math.pi / 180) * ((n - k + 1) / n)
-            elif length == 4:
-                sim = 0.85 * math.cos(n * math.pi / 180) * ((n - k + 1) / n)
-            elif length == 5:
-                sim = 0.9 * math.cos(n * math.pi / 180) * ((n - k + 1) / n)
-            elif length == 8 and sameCode[-1] == '#':
-                sim = 0.9
-            elif length == 8 and sameCode[-1] == '=':
-                sim = 1
+            if simCache is None:
+                sim = simByCode(code1, code2, cilinIndex)
             else:
-                sim = 0.1
+                sim = simCache.get(code1, code2, cilinIndex)
             if sim > maxSim:
                 maxSim = sim
     return maxSim
 
 
-def calculationSim(wordsData):
-    cilinData = cilin()
+def candidatePairs(codedWords, wordCodeDic, cilinIndex, minSim):
+    """按词林编码前缀分桶，找出相似度可能超过minSim的词语对，返回下标对(i, j)，i < j
+
+    含'@'标记、不共享大类或只有末位标记不同的编码对相似度恒为0.1；
+    共享前d层的编码对的相似度只取决于公共前缀下的编码数n和下一层的差值k，
+    因此只需在每个前缀下枚举满足阈值的子类组合，代价与文档词数和边数近似成线性
+    """
+    pairs = set()
+    if minSim < 0.1:
+        # 阈值过低时任意词语对都可能成边
+        for i in range(len(codedWords)):
+            for j in range(i + 1, len(codedWords)):
+                pairs.add((i, j))
+        return pairs
+
+    # 编码完全相同的词语，以及按公共前缀和下一层取值分桶的词语
+    sameCodes = defaultdict(set)
+    buckets = {depth: defaultdict(lambda: defaultdict(set)) for depth in range(1, 5)}
+    for i, word in enumerate(codedWords):
+        for code in wordCodeDic[word]:
+            if code[-1] == '@':
+                continue
+            levels = cilin_store.encode_code(code)
+            sameCodes[code].add(i)
+            for depth in range(1, 5):
+                prefix = code[:cilin_store.LEVEL_SLICES[depth - 1][1]]
+                buckets[depth][prefix][levels[depth]].add(i)
+
+    for code, members in sameCodes.items():
+        if len(members) > 1 and simByCode(code, code, cilinIndex) > minSim:
+            members = sorted(members)
+            for x, i in enumerate(members):
+                for j in members[x + 1:]:
+                    pairs.add((i, j))
+
+    for depth, prefixes in buckets.items():
+        length = cilin_store.LEVEL_SLICES[depth - 1][1]
+        for prefix, children in prefixes.items():
+            if len(children) < 2:
+                continue
+            n = getN(prefix, cilinIndex.prefixCount)
+            values = sorted(children)
+            for x, value1 in enumerate(values):
+                for value2 in values[x + 1:]:
+                    if levelSim(length, n, value2 - value1) <= minSim:
+                        continue
+                    for i in children[value1]:
+                        for j in children[value2]:
+                            if i != j:
+                                pairs.add((i, j) if i < j else (j, i))
+    return pairs
+
+
+def _candidateSims(codedWords, wordCodeDic, cilinIndex, minSim, simCache, known, newPairs, stage):
+    """按下标顺序逐对产出候选词语对的相似度(i, j, sim)
+
+    优先使用持久化存储中已有的值，新计算的词语对追加到newPairs中；每进入新的一行按stage报告一次进度
+    """
+    row = -1
+    for i, j in sorted(candidatePairs(codedWords, wordCodeDic, cilinIndex, minSim)):
+        if i != row:
+            row = i
+            progress_hook.reportProgress(stage, i, len(codedWords))
+        word1, word2 = codedWords[i], codedWords[j]
+        sim = known.get(word1, {}).get(word2)
+        if sim is None:
+            sim = simByCilin(wordCodeDic[word1], wordCodeDic[word2], cilinIndex, simCache)
+            newPairs.append((word1, word2, sim))
+        yield i, j, sim
+
+
+def calculationSim(wordsData, engine='auto', simCache=None, simStore=None, minSim=None):
+    """计算候选词两两之间的词林相似度
+
+    相似度是对称的，只计算上三角后镜像填充。
+    engine为'numpy'时使用sim_matrix批量计算相似度矩阵，为'python'时逐对调用simByCilin，
+    并可通过simCache(CodeSimCache)在多个文档之间复用编码对的相似度；
+    为'auto'时在安装了NumPy且候选词不少于VECTOR_MIN_WORDS个时使用批量计算。
+    传入simStore(sim_store.SimStore)时先读取已持久化的词语对，只计算缺失的部分并写回。
+    指定minSim时只计算candidatePairs筛选出的可能超过阈值的词语对，返回稀疏的相似度字典，
+    未出现的词语对相似度不超过minSim
+    """
+    if engine not in ('auto', 'numpy', 'python'):
+        raise ValueError(f"未知的相似度计算方式: {engine}")
+
+    cilinIndex = getCilinIndex()
     wordCodeDic = {}  # 记录词语编码的字典
     for word in wordsData:
-        codeData = []
-        for code, words in cilinData.items():
-            if word in words:
-                codeData.append(code)
-        wordCodeDic[word] = codeData
+        wordCodeDic[word] = cilinIndex.getCodes(word)
 
     # 储存词语语义相关度
     wordsSim = {}
     # 存储词林中缺失的词语
-    missingWord = []
+    missingWord = list(set(word for word in wordsData if len(wordCodeDic[word]) == 0))
+    # 词林中存在的词语，保持候选词顺序
+    codedWords = [word for word in wordsData if len(wordCodeDic[word]) > 0]
 
-    for word1 in wordsData:
-        wordSim = {}
-        word1Code = wordCodeDic[word1]
-        if len(word1Code) == 0:
-            missingWord.append(word1)
-            continue
-        for word2 in wordsData:
-            word2Code = wordCodeDic[word2]
-            if len(word2Code) == 0:
-                missingWord.append(word2)
-                continue
-            wordSim[word2] = simByCilin(word1Code, word2Code, cilinData)
-        wordsSim[word1] = wordSim
-        QApplication.processEvents()
+    sim_matrix = getSimMatrix() if engine != 'python' else None
+    if engine == 'auto':
+        useNumpy = sim_matrix is not None and len(codedWords) >= VECTOR_MIN_WORDS
+        engine = 'numpy' if useNumpy else 'python'
 
-    missingWord = list(set(missingWord))
+    # 持久化存储中已有的词语对相似度
+    known = simStore.lookup(codedWords) if simStore is not None else {}
+    newPairs = []
+
+    if minSim is not None:
+        for word1 in codedWords:
+            wordsSim[word1] = {}
+        # 按下标顺序填充，使每行的词语顺序与候选词顺序一致
+        for i, j, sim in _candidateSims(codedWords, wordCodeDic, cilinIndex, minSim,
+                                        simCache, known, newPairs, PROGRESS_SIMILARITY):
+            wordsSim[codedWords[i]][codedWords[j]] = sim
+            wordsSim[codedWords[j]][codedWords[i]] = sim
+        progress_hook.reportProgress(PROGRESS_SIMILARITY, len(codedWords), len(codedWords))
+    elif engine == 'numpy':
+        codes = [wordCodeDic[word] for word in codedWords]
+        # 与其他候选词的相似度不完整的词语才需要计算
+        wordCount = len(set(codedWords))
+        dirty = [i for i, word in enumerate(codedWords) if len(known.get(word, ())) < wordCount]
+        if len(dirty) == len(codedWords):
+            matrix = sim_matrix.symmetricSimMatrix(codes, cilinIndex)
+            for i, (word1, row) in enumerate(zip(codedWords, matrix.tolist())):
+                wordsSim[word1] = dict(zip(codedWords, row))
+                if simStore is not None:
+                    knownRow = known.get(word1, {})
+                    newPairs.extend((word1, word2, sim) for word2, sim in zip(codedWords[i:], row[i:])
+                                    if word2 not in knownRow)
+        else:
+            if dirty:
+                matrix = sim_matrix.simMatrix([codes[i] for i in dirty], codes, cilinIndex)
+                for i, row in zip(dirty, matrix.tolist()):
+                    word1 = codedWords[i]
+                    knownRow = known.setdefault(word1, {})
+                    for word2, sim in zip(codedWords, row):
+                        if word2 not in knownRow:
+                            newPairs.append((word1, word2, sim))
+                            knownRow[word2] = sim
+                            known.setdefault(word2, {})[word1] = sim
+            for word1 in codedWords:
+                knownRow = known[word1]
+                wordsSim[word1] = {word2: knownRow[word2] for word2 in codedWords}
+        progress_hook.reportProgress(PROGRESS_SIMILARITY, len(codedWords), len(codedWords))
+    else:
+        for word1 in codedWords:
+            wordsSim[word1] = {}
+        for i, word1 in enumerate(codedWords):
+            word1Code = wordCodeDic[word1]
+            knownRow = known.get(word1, {})
+            for word2 in codedWords[i:]:
+                sim = knownRow.get(word2)
+                if sim is None:
+                    sim = simByCilin(word1Code, wordCodeDic[word2], cilinIndex, simCache)
+                    newPairs.append((word1, word2, sim))
+                wordsSim[word1][word2] = sim
+                wordsSim[word2][word1] = sim
+            progress_hook.reportProgress(PROGRESS_SIMILARITY, i + 1, len(codedWords))
+
+    if simStore is not None:
+        simStore.save(newPairs)
 
     return wordsSim, missingWord
 
 
-def getGraph(wordsData, wordsSim):
-    minSim = 0.4  # 提高相似度阈值，使边的关系更严格
+def getGraph(wordsData, wordsSim, minSim=GRAPH_MIN_SIM, topK=None):
+    """由相似度字典构建语义图，相似度超过minSim的词语对成边(minSim为None时不按阈值过滤)
+
+    topK不为None时每个词语只保留相似度最高的topK条边，见nearestEdges
+    """
     graphDatas = {}  # 储存节点间的边
     for word in wordsSim.keys():
         graphData = {}
-        for otherWord in wordsSim.keys():
+        # wordsSim可能是只包含候选词语对的稀疏字典，每行的词语顺序与候选词顺序一致
+        for otherWord, sim in wordsSim[word].items():
             if word != otherWord:
-                sim = wordsSim[word][otherWord]
-                if sim > minSim:
+                if minSim is None or sim > minSim:
                     # 使用指数函数使相似度差异更明显
                     graphData[otherWord] = math.exp(-sim)
         if len(graphData) == 0:
             continue
         graphDatas[word] = graphData
-    return graphDatas
+    if topK is not None:
+        graphDatas = nearestEdges(graphDatas, topK)
+    return WordGraph.fromDict(graphDatas)
+
+
+def nearestEdges(graphDatas, topK):
+    """k近邻稀疏化：每个词语选出边权最小(相似度最高)的topK个邻接词，相似度相同时按邻接表顺序选取
+
+    任一端选中的边即保留，图仍为无向图且边数不超过topK·n，各行保持原有的邻接词顺序
+    """
+    if topK < 1:
+        raise ValueError(f"topK必须为正整数: {topK}")
+    nearest = {word: set(heapq.nsmallest(topK, graphData, key=graphData.get))
+               for word, graphData in graphDatas.items()}
+    result = {}
+    for word, graphData in graphDatas.items():
+        kept = {otherWord: weight for otherWord, weight in graphData.items()
+                if otherWord in nearest[word] or word in nearest.get(otherWord, ())}
+        if kept:
+            result[word] = kept
+    return result
+
+
+def buildGraph(wordsData, simCache=None, simStore=None, minSim=GRAPH_MIN_SIM, bucketed=True, topK=None):
+    """融合相似度计算与建图：超过阈值的边直接写入邻接表，不保存稠密的相似度矩阵
+
+    bucketed为True时只计算candidatePairs筛选出的词语对，并读写simStore；
+    为False时逐块计算全部词语对（NumPy不可用时逐对计算），不使用simStore。
+    minSim为None时不按阈值过滤，全部词语对都参与计算；topK不为None时按nearestEdges保留每个词语的k近邻。
+    返回结果与getGraph(wordsData, calculationSim(wordsData)[0], minSim, topK)相同的WordGraph，另返回词林中缺失的词语
+    """
+    if minSim is None:
+        minSim = -math.inf
+    cilinIndex = getCilinIndex()
+    wordCodeDic = {}  # 记录词语编码的字典
+    for word in wordsData:
+        wordCodeDic[word] = cilinIndex.getCodes(word)
+    missingWord = list(set(word for word in wordsData if len(wordCodeDic[word]) == 0))
+    codedWords = [word for word in wordsData if len(wordCodeDic[word]) > 0]
+
+    # 按下标记录邻接表，边按下标递增的顺序到达，各行的邻接词顺序与候选词顺序一致
+    adjacency = [{} for _ in codedWords]
+
+    def addEdge(i, j, sim):
+        word1, word2 = codedWords[i], codedWords[j]
+        if sim > minSim and word1 != word2:
+            # 使用指数函数使相似度差异更明显
+            weight = math.exp(-sim)
+            adjacency[i][word2] = weight
+            adjacency[j][word1] = weight
+
+    if bucketed:
+        known = simStore.lookup(codedWords) if simStore is not None else {}
+        newPairs = []
+        for i, j, sim in _candidateSims(codedWords, wordCodeDic, cilinIndex, minSim,
+                                        simCache, known, newPairs, PROGRESS_GRAPH):
+            addEdge(i, j, sim)
+        if simStore is not None:
+            simStore.save(newPairs)
+    elif getSimMatrix() is not None:
+        codes = [wordCodeDic[word] for word in codedWords]
+        for first, last, block in getSimMatrix().iterSymmetricBlocks(codes, cilinIndex):
+            rows, cols = (block > minSim).nonzero()
+            for row, col, sim in zip(rows.tolist(), cols.tolist(), block[rows, cols].tolist()):
+                i, j = first + row, first + col
+                if i < j:
+                    addEdge(i, j, sim)
+            progress_hook.reportProgress(PROGRESS_GRAPH, last, len(codedWords))
+    else:
+        for i, word1 in enumerate(codedWords):
+            for j in range(i + 1, len(codedWords)):
+                addEdge(i, j, simByCilin(wordCodeDic[word1], wordCodeDic[codedWords[j]],
+                                         cilinIndex, simCache))
+            progress_hook.reportProgress(PROGRESS_GRAPH, i + 1, len(codedWords))
+    progress_hook.reportProgress(PROGRESS_GRAPH, len(codedWords), len(codedWords))
+
+    graphDatas = {}  # 储存节点间的边
+    for word, graphData in zip(codedWords, adjacency):
+        if len(graphData) > 0:
+            graphDatas[word] = graphData
+    if topK is not None:
+        graphDatas = nearestEdges(graphDatas, topK)
+    return WordGraph.fromDict(graphDatas), missingWord
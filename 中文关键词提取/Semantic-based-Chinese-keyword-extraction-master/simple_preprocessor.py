@@ -1,55 +1,21 @@
-import os
 import re
-import jieba
-import jieba.posseg as pseg
 from collections import defaultdict
 
-# 允许的词性列表
-ALLOW_SPEECH_TAGS = ('a', 'ad', 'an', 'i', 'j', 'l', 'v', 'vg', 'vd', 'vn', 'n', 'ns', 'nsf', 'nt', 'nz')
-NOT_ALLOW_TAGS = ('x', 'w')
+import lexicon
+import tokenizer_manager
 
-def initialize_jieba():
-    """初始化jieba分词器"""
-    # 获取当前文件所在目录
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-
-    # 尝试加载主词典
-    dict_path = os.path.join(current_dir, 'dict_file', 'dict.txt.big')
-    if os.path.exists(dict_path):
-        try:
-            jieba.set_dictionary(dict_path)
-            print(f"已加载主词典: {dict_path}")
-        except Exception as e:
-            print(f"加载主词典失败: {str(e)}")
-
-    # 尝试加载用户词典
-    user_dict_path = os.path.join(current_dir, 'dict_file', 'user_dict.txt')
-    if os.path.exists(user_dict_path):
-        try:
-            jieba.load_userdict(user_dict_path)
-            print(f"已加载用户词典: {user_dict_path}")
-        except Exception as e:
-            print(f"加载用户词典失败: {str(e)}")
+# 允许的词性集合，与其他预处理方式共用lexicon中的定义
+ALLOW_SPEECH_TAGS = lexicon.ALLOW_SPEECH_TAGS
+NOT_ALLOW_TAGS = lexicon.NOT_ALLOW_TAGS
 
-    # 初始化jieba
-    jieba.initialize()
+def initialize_jieba():
+    """初始化jieba分词器，词典在本进程中只加载一次"""
+    tokenizer_manager.initialize()
     return True
 
 def load_stop_words():
-    """加载停用词"""
-    stop_words = []
-    try:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        stop_words_path = os.path.join(current_dir, 'dict_file', 'stop_words.txt')
-        if os.path.exists(stop_words_path):
-            with open(stop_words_path, 'r', encoding='utf-8') as f:
-                stop_words = [line.strip() for line in f.readlines()]
-            print(f"已加载 {len(stop_words)} 个停用词")
-        else:
-            print(f"停用词文件不存在: {stop_words_path}")
-    except Exception as e:
-        print(f"加载停用词时出错: {str(e)}")
-    return stop_words
+    """加载停用词，返回在本进程中共享的frozenset"""
+    return lexicon.stop_words()
 
 def split_sentences(text):
     """按标点符号分句"""
@@ -75,14 +41,15 @@ def safe_cut(text, use_paddle=False):
         if use_paddle:
             try:
                 print("使用paddle模式进行分词...")
+                import jieba.posseg as pseg
                 words_with_pos = pseg.cut(text, use_paddle=True)
             except Exception as e:
                 print(f"使用paddle模式分词失败: {str(e)}，切换为普通模式")
                 print("使用普通模式进行分词...")
-                words_with_pos = pseg.cut(text)
+                words_with_pos = tokenizer_manager.get_pos_tokenizer().cut(text)
         else:
             print("使用普通模式进行分词...")
-            words_with_pos = pseg.cut(text)
+            words_with_pos = tokenizer_manager.get_pos_tokenizer().cut(text)
             
         # 将生成器转换为列表，以便多次使用
         result = list(words_with_pos)
@@ -110,41 +77,43 @@ def safe_cut(text, use_paddle=False):
         # 出错时返回空列表
         return []
 
-def extract_candidate_words(text, title, stop_words):
-    """提取候选关键词"""
+def extract_candidate_words(text, title, stop_words, stream=None):
+    """提取候选关键词，传入文档共用的TokenStream时直接使用其分词结果"""
     try:
         words_data = []  # 候选关键词列表
         words_flag_dict = {}  # 词语-词性映射
         
-        # 确保停用词是列表或集合
-        if not isinstance(stop_words, (list, set, tuple)):
-            print(f"警告: 停用词不是集合类型: {type(stop_words)}")
-            if hasattr(stop_words, '__iter__') and not isinstance(stop_words, str):
-                stop_words = list(stop_words)
+        # 确保停用词是集合，逐词判断时为O(1)查找
+        if not isinstance(stop_words, (set, frozenset)):
+            if isinstance(stop_words, (list, tuple)):
+                stop_words = frozenset(stop_words)
             else:
-                stop_words = []
-        
-        # 处理正文
+                print(f"警告: 停用词不是集合类型: {type(stop_words)}")
+                if hasattr(stop_words, '__iter__') and not isinstance(stop_words, str):
+                    stop_words = frozenset(stop_words)
+                else:
+                    stop_words = frozenset()
+        
+        # 处理正文，标题在其后处理（标题词语权重更高）
+        parts = []
         if text and isinstance(text, str):
-            words_with_pos = safe_cut(text)
-            for word_pos in words_with_pos:
-                if (hasattr(word_pos, 'word') and hasattr(word_pos, 'flag') and 
-                    len(word_pos.word) > 1 and 
-                    word_pos.flag in ALLOW_SPEECH_TAGS and 
-                    word_pos.word not in stop_words):
-                    words_data.append(word_pos.word)
-                    words_flag_dict[word_pos.word] = word_pos.flag
-        
-        # 处理标题（标题词语权重更高）
+            if stream is not None:
+                parts.append(stream.pairs(stream.bodySpan()))
+            else:
+                parts.append((word_pos.word, word_pos.flag) for word_pos in safe_cut(text)
+                             if hasattr(word_pos, 'word') and hasattr(word_pos, 'flag'))
         if title and isinstance(title, str):
-            title_words = safe_cut(title)
-            for word_pos in title_words:
-                if (hasattr(word_pos, 'word') and hasattr(word_pos, 'flag') and 
-                    len(word_pos.word) > 1 and 
-                    word_pos.flag in ALLOW_SPEECH_TAGS and 
-                    word_pos.word not in stop_words):
-                    words_data.append(word_pos.word)
-                    words_flag_dict[word_pos.word] = word_pos.flag
+            if stream is not None:
+                parts.append(stream.pairs(stream.titleSpan()))
+            else:
+                parts.append((word_pos.word, word_pos.flag) for word_pos in safe_cut(title)
+                             if hasattr(word_pos, 'word') and hasattr(word_pos, 'flag'))
+
+        for words_with_pos in parts:
+            for word, flag in words_with_pos:
+                if len(word) > 1 and flag in ALLOW_SPEECH_TAGS and word not in stop_words:
+                    words_data.append(word)
+                    words_flag_dict[word] = flag
         
         # 去重
         words_data = list(set(words_data))
@@ -154,8 +123,8 @@ def extract_candidate_words(text, title, stop_words):
         print(f"提取候选关键词时出错: {str(e)}")
         return [], {}
 
-def simple_preprocess(text, title):
-    """简化的预处理过程"""
+def simple_preprocess(text, title, stream=None):
+    """简化的预处理过程，stream为文档共用的TokenStream(对标题与正文text分词的结果)"""
     try:
         print("开始简化预处理...")
         
@@ -175,7 +144,7 @@ def simple_preprocess(text, title):
         stop_words = load_stop_words()
         
         # 3. 提取候选关键词
-        words_data, words_flag_dict = extract_candidate_words(text, title, stop_words)
+        words_data, words_flag_dict = extract_candidate_words(text, title, stop_words, stream)
         print(f"预处理完成，共提取 {len(words_data)} 个候选关键词")
         
         # 4. 提取首尾句
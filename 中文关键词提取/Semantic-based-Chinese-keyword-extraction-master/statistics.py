@@ -1,16 +1,18 @@
-import jieba.posseg as pseg
 from collections import defaultdict
-import jieba.analyse as ayse
+from operator import itemgetter
+
+import lexicon
+import tokenizer_manager
 #ayse.set_idf_path("./idf.txt")
 
-NOT_ALLOW_TAGS = ['x', 'w']
+NOT_ALLOW_TAGS = lexicon.NOT_ALLOW_TAGS
 # 词性过滤文件(保留形容词、副形词、名形词、成语、简称略语、习用语、动词、动语素、副动词、名动词、名词、地名、音译地名、机构团体名、其他专名)
-ALLOW_SPEECH_TAGS = ['a', 'ad', 'an', 'i', 'j', 'l', 'v', 'vg', 'vd', 'vn', 'n', 'ns', 'nsf', 'nt', 'nz']
+ALLOW_SPEECH_TAGS = lexicon.ALLOW_SPEECH_TAGS
 
 
 def sentence_segmentation(text):
     wordData = []
-    psegDataList = pseg.cut(text)
+    psegDataList = tokenizer_manager.get_pos_tokenizer().cut(text)
     for data in psegDataList:
         wordData.append(data.word)
     return wordData
@@ -36,6 +38,7 @@ def getLoc(wordsData, interDensity, title, firstSentence, lastSentence):
 
 
 def getTextRank(length, text):
+    ayse = tokenizer_manager.get_analyse()
     try:
         # 尝试使用allowPOS参数
         tags = ayse.textrank(text, topK=length, withWeight=True, allowPOS=ALLOW_SPEECH_TAGS)
@@ -48,7 +51,11 @@ def getTextRank(length, text):
     return textRankScore
 
 
-def getTfidf(length, text):
+# stream为文档共用的TokenStream，传入时直接使用其分词结果，计算方式与jieba.analyse相同
+def getTfidf(length, text, stream=None):
+    if stream is not None:
+        return _tfidfFromStream(length, stream, ALLOW_SPEECH_TAGS)
+    ayse = tokenizer_manager.get_analyse()
     try:
         # 尝试使用allowPOS参数
         tags = ayse.extract_tags(text, topK=length, withWeight=True, allowPOS=ALLOW_SPEECH_TAGS)
@@ -61,33 +68,36 @@ def getTfidf(length, text):
     return tfidf
 
 
+# 与jieba.analyse.extract_tags(allowPOS=allowPOS)相同的TF-IDF，使用默认的IDF词典与停用词
+def _tfidfFromStream(length, stream, allowPOS):
+    extractor = tokenizer_manager.get_analyse().default_tfidf
+    freq = {}
+    for word, flag in stream.pairs():
+        if flag not in allowPOS or len(word.strip()) < 2 or word.lower() in extractor.stop_words:
+            continue
+        freq[word] = freq.get(word, 0.0) + 1.0
+    total = sum(freq.values())
+    for word in freq:
+        freq[word] *= extractor.idf_freq.get(word, extractor.median_idf) / total
+    tfidf = defaultdict(float)
+    for word, weight in sorted(freq.items(), key=itemgetter(1), reverse=True)[:length or None]:
+        tfidf[word] = weight
+    return tfidf
+
+
 def getFlag(wordsFlag, wordsData):
-    flagWeight = defaultdict(float)
-    flagWeight['n'] = 1.2  # 提高普通名词权重
-    flagWeight['j'] = 0.6  # 降低简称略语权重
-    flagWeight['nr'] = 1.5  # 提高人名权重
-    flagWeight['ns'] = 1.3  # 提高地名权重
-    flagWeight['nsf'] = 1.3  # 提高音译地名权重
-    flagWeight['nt'] = 1.4  # 提高机构团体名权重
-    flagWeight['nz'] = 1.4  # 提高其他专名权重
-    flagWeight['an'] = 0.4  # 降低名形词权重
-    flagWeight['l'] = 0.4  # 降低习用语权重
-    flagWeight['vn'] = 0.6  # 提高名动词权重
-    flagWeight['i'] = 0.3  # 降低成语权重
-    flagWeight['a'] = 0.3  # 降低形容词权重
-    flagWeight['vd'] = 0.3  # 降低副动词权重
-    flagWeight['ad'] = 0.2  # 降低副形词权重
-    flagWeight['v'] = 0.2  # 降低动词权重
-    flagWeight['vg'] = 0.2  # 降低动语素权重
+    # 词性权重见lexicon.FLAG_WEIGHTS，未列出的词性权重为0
+    flagWeight = lexicon.FLAG_WEIGHTS
 
     wordsFlagWeight = defaultdict(float)
     for word in wordsData:
-        wordsFlagWeight[word] = flagWeight[wordsFlag[word]]
+        wordsFlagWeight[word] = flagWeight.get(wordsFlag[word], 0.0)
 
     return wordsFlagWeight
 
 
 def getTextRank1(length, text):
+    ayse = tokenizer_manager.get_analyse()
     tags = ayse.textrank(text, topK=length, withWeight=True)
     textRankScore = defaultdict(float)
     for item in tags:
@@ -96,6 +106,7 @@ def getTextRank1(length, text):
 
 
 def getTfidf1(length, text):
+    ayse = tokenizer_manager.get_analyse()
     tags = ayse.extract_tags(text, topK=length, withWeight=True)
     tfidf = defaultdict(float)
     for item in tags:
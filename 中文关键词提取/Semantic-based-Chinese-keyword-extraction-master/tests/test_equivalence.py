@@ -0,0 +1,175 @@
+# 回归测试：各项性能优化必须与原实现的结果完全相同
+# 用法: python -m pytest tests 或 python -m unittest discover tests
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cilin_store
+import dijkstra
+import intermediate
+import similarity
+import textPrecessing
+import tokenizer_manager
+from token_stream import TokenStream
+
+
+def sample_words(count, seed):
+    """从词林中按固定种子抽取词语，作为候选词"""
+    words = set()
+    with open(similarity.cilinPath, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            words.update(parts[1:])
+    return random.Random(seed).sample(sorted(words), count)
+
+
+class CilinStoreTest(unittest.TestCase):
+    """二进制词林与解析文本得到的CilinIndex查到的编码及前缀计数相同"""
+
+    def test_codes_and_prefix_counts(self):
+        store = similarity.getCilinIndex()
+        self.assertIsInstance(store, cilin_store.CilinStore)
+        cilinData = similarity.cilin()
+        index = similarity.CilinIndex(cilinData)
+        for word in sample_words(2000, 6) + ['不在词林中的词']:
+            self.assertEqual(store.getCodes(word), index.getCodes(word), word)
+        for code in random.Random(7).sample(sorted(cilinData), 500):
+            for _, end in cilin_store.LEVEL_SLICES:
+                self.assertEqual(store.prefixCount.get(code[:end], 0), index.prefixCount.get(code[:end], 0), code[:end])
+
+
+class SimilarityEngineTest(unittest.TestCase):
+    """NumPy批量计算的相似度矩阵与逐对调用simByCilin的结果相同"""
+
+    def test_numpy_engine(self):
+        if similarity.getSimMatrix() is None:
+            self.skipTest('未安装NumPy')
+        for seed in (8, 9):
+            words = sample_words(300, seed)
+            vectorized, missing = similarity.calculationSim(words, engine='numpy')
+            pairwise, expectedMissing = similarity.calculationSim(words, engine='python')
+            self.assertEqual(vectorized, pairwise)
+            self.assertEqual(sorted(missing), sorted(expectedMissing))
+
+
+class CandidatePairsTest(unittest.TestCase):
+    """按编码前缀分桶筛选的词语对包含全部相似度超过阈值的词语对，相似度与完整计算相同"""
+
+    def test_sparse_similarity(self):
+        minSim = similarity.GRAPH_MIN_SIM
+        for seed in (10, 11):
+            words = sample_words(300, seed)
+            dense, _ = similarity.calculationSim(words, engine='python')
+            sparse, _ = similarity.calculationSim(words, engine='python', minSim=minSim)
+            for word1, row in sparse.items():
+                for word2, sim in row.items():
+                    self.assertEqual(sim, dense[word1][word2], (word1, word2))
+            for word1, row in dense.items():
+                for word2, sim in row.items():
+                    # 语义图不含自环，同一词语之间的相似度不需要计算
+                    if sim > minSim and word1 != word2:
+                        self.assertIn(word2, sparse[word1], (word1, word2))
+
+
+class BuildGraphTest(unittest.TestCase):
+    """融合建图的结果与先计算完整相似度矩阵再建图相同，顶点及邻接词的顺序也相同"""
+
+    def test_fused_graph(self):
+        for seed in (12, 13):
+            words = sample_words(300, seed)
+            wordsSim, expectedMissing = similarity.calculationSim(words, engine='python')
+            expected = similarity.getGraph(words, wordsSim)
+            for bucketed in (True, False):
+                graph, missing = similarity.buildGraph(words, bucketed=bucketed)
+                self.assertEqual(list(graph), list(expected), bucketed)
+                self.assertEqual([list(graph[word].items()) for word in graph],
+                                 [list(expected[word].items()) for word in expected], bucketed)
+                self.assertEqual(sorted(missing), sorted(expectedMissing))
+
+
+class BetweennessTest(unittest.TestCase):
+    """compat方式的居间度与原实现(逐轮扫描的dijkstra_scan + 路径字符串计数)相同"""
+
+    def test_compat_matches_scan(self):
+        graph, _ = similarity.buildGraph(sample_words(300, 5))
+        graphDatas = graph.toDict()
+        shortestDatas = {word: dijkstra.dijkstra_scan(graphDatas, word) for word in graphDatas}
+        expected = {word: intermediate.intermediaryDegreeScore(word, shortestDatas) for word in graphDatas}
+        self.assertEqual(intermediate.getIntermediate(graph, intermediate.BC_COMPAT), expected)
+        self.assertEqual(intermediate.getIntermediateByPaths(graphDatas), expected)
+
+
+class DensityTest(unittest.TestCase):
+    """densityByArray与densityByStrings的区间划分结果相同"""
+
+    def check(self, sortedInterval):
+        for refine in (intermediate.REFINE_GEOMETRIC, intermediate.REFINE_BISECT):
+            expected = intermediate.densityByStrings(sortedInterval, 12, 1.8, 0.15, 8, refine)
+            actual = intermediate.densityByArray(sortedInterval, 12, 1.8, 0.15, 8, refine)
+            self.assertEqual(dict(actual), dict(expected), refine)
+
+    def test_document_graph(self):
+        for seed in (1, 2, 3):
+            graph, _ = similarity.buildGraph(sample_words(300, seed))
+            interval = intermediate.getIntermediate(graph)
+            self.check(sorted(interval.items(), key=lambda item: item[1], reverse=True))
+
+    def test_words_with_commas(self):
+        # 原实现用逗号拼接词语，含逗号的词语按拆开后的个数计数
+        self.check([('甲', 9.0), ('乙,丙', 5.0), ('丁', 5.0), ('戊', 1.0), ('己,庚,辛', 0.0)])
+
+
+class ParallelTest(unittest.TestCase):
+    """getIntermediate的结果与进程数无关"""
+
+    def setUp(self):
+        # 缩小分块并取消规模下限，使小图也拆成多个任务交给进程池
+        self.saved = intermediate.PARALLEL_CHUNK, intermediate.PARALLEL_MIN_NODES
+        intermediate.PARALLEL_CHUNK, intermediate.PARALLEL_MIN_NODES = 8, 0
+
+    def tearDown(self):
+        intermediate.PARALLEL_CHUNK, intermediate.PARALLEL_MIN_NODES = self.saved
+
+    def test_workers(self):
+        graph, _ = similarity.buildGraph(sample_words(300, 4))
+        for mode in (intermediate.BC_COMPAT, intermediate.BC_BRANDES):
+            serial = intermediate.getIntermediate(graph, mode, workers=1)
+            parallel = intermediate.getIntermediate(graph, mode, workers=3)
+            self.assertEqual(parallel, serial, mode)
+
+
+class TokenStreamTest(unittest.TestCase):
+    """TokenStream按句子截取的分词结果与逐句分词相同"""
+
+    DOCUMENTS = [
+        ('江苏银行发布年度报告', '江苏银行今日发布年度报告，净利润同比提高12.5%。银行表示；将继续支持实体经济！'
+                            '数字化转型进展如何？  未来将加快 Fintech 建设。。'),
+        ('Python 3.12 发布', '新版本提升了解释器性能。 \n 支持更多语法；以及新的标准库模块！'),
+        ('', '没有标题的文档。只有正文'),
+        ('只有标题', ''),
+    ]
+
+    def test_sentences(self):
+        tokenizer = tokenizer_manager.get_pos_tokenizer()
+        for title, body in self.DOCUMENTS:
+            stream = TokenStream(title, body)
+            expected = [[(pair.word, pair.flag) for pair in tokenizer.cut(sentence)]
+                        for sentence in textPrecessing.split_sentences(body)]
+            actual = [list(stream.pairs(indices)) for indices in stream.sentences(stream.bodySpan())]
+            self.assertEqual(actual, expected, body)
+
+    def test_title_and_body(self):
+        tokenizer = tokenizer_manager.get_pos_tokenizer()
+        for title, body in self.DOCUMENTS:
+            stream = TokenStream(title, body)
+            self.assertEqual(list(stream.pairs(stream.titleSpan())),
+                             [(pair.word, pair.flag) for pair in tokenizer.cut(title)])
+            self.assertEqual(list(stream.pairs(stream.bodySpan())),
+                             [(pair.word, pair.flag) for pair in tokenizer.cut(body)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,3 @@
-import jieba.posseg as pseg
-import jieba
 #jieba.set_dictionary("./dict.txt")
 #jieba.initialize()
 
@@ -7,28 +5,18 @@ import re
 from collections import defaultdict
 import os
 
+import lexicon
+import tokenizer_manager
+from token_stream import TokenStream
+
 # 获取当前文件所在目录
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
-# 初始化jieba分词
-dict_path = os.path.join(current_dir, 'dict_file', 'dict.txt.big')
-user_dict_path = os.path.join(current_dir, 'dict_file', 'user_dict.txt')
-
-# 加载主词典
-if os.path.exists(dict_path):
-    jieba.set_dictionary(dict_path)
-    print(f"已加载主词典: {dict_path}")
-
-# 加载用户自定义词典
-if os.path.exists(user_dict_path):
-    jieba.load_userdict(user_dict_path)
-    print(f"已加载用户词典: {user_dict_path}")
-
-jieba.initialize()
+# jieba分词器在首次分词时由tokenizer_manager初始化，主词典与用户词典在本进程中只加载一次
 
 # 词性过滤文件(保留形容词、副形词、名形词、成语、简称略语、习用语、动词、动语素、副动词、名动词、名词、地名、音译地名、机构团体名、其他专名)
-ALLOW_SPEECH_TAGS = ['a', 'ad', 'an', 'i', 'j', 'l', 'v', 'vg', 'vd', 'vn', 'n', 'ns', 'nsf', 'nt', 'nz']
-NOT_ALLOW_TAGS = ['x', 'w']
+ALLOW_SPEECH_TAGS = lexicon.ALLOW_SPEECH_TAGS
+NOT_ALLOW_TAGS = lexicon.NOT_ALLOW_TAGS
 
 # 分句
 def split_sentences(text):
@@ -60,19 +48,18 @@ def addDict(preDict, afterDict, lastWord, word):
 def sentence_segmentation(title):
     print('------对标题进行预处理------')
     wordData = []
-    psegDataList = pseg.cut(title)
+    psegDataList = tokenizer_manager.get_pos_tokenizer().cut(title)
     for data in psegDataList:
         wordData.append(data.word)
     return wordData
 
 
 # 预处理
-def word_segmentation(body, title):
+# stream为文档共用的TokenStream，未传入时在此分词
+def word_segmentation(body, title, stream=None):
     print('------当前进行分词&词性标注&去重停用词&保留指定词性词语操作------')
-    # 加载停用词文件
-    stop_words_path = os.path.join(current_dir, 'dict_file', 'stop_words.txt')
-    stopWords = [line.strip() for line in open(stop_words_path, encoding='utf-8').readlines()]
-    print(f"已加载 {len(stopWords)} 个停用词")
+    # 停用词集合在本进程中只加载一次
+    stopWords = lexicon.stop_words()
 
     # 分句
     sentences_list = split_sentences(body)
@@ -86,6 +73,11 @@ def word_segmentation(body, title):
     sentences_list.append(title)
     print(f"处理文本共 {len(sentences_list)} 个句子")
 
+    if stream is None:
+        stream = TokenStream(title, body)
+    # 正文逐句处理，标题整体作为最后一句
+    sentenceTokens = stream.sentences(stream.bodySpan()) + [stream.titleSpan()]
+
     # 候选关键词
     wordsData = []
     # 存储词语词性
@@ -99,31 +91,27 @@ def word_segmentation(body, title):
     # 储存每个单词有多少个前继词语
     preWordSum = defaultdict(int)
 
-    # 使用jieba的搜索引擎模式进行分词
-    for sentence in sentences_list:
-        # jieba分词&词性标注
-        psegDataList = pseg.cut(sentence, use_paddle=True)  # 使用paddle模式提高准确率
-
+    for indices in sentenceTokens:
         # 记录上一个词语的词性
         lastFlag = 'w'
         # 记录上一个词语
         lastWord = ''
 
-        for data in psegDataList:
+        for word, flag in stream.pairs(indices):
             # 记录词语的前继后继关系
-            if lastFlag not in NOT_ALLOW_TAGS and data.flag not in NOT_ALLOW_TAGS and data.word not in stopWords and lastWord not in stopWords:
-                addDict(preDict, nextDict, lastWord, data.word)
+            if lastFlag not in NOT_ALLOW_TAGS and flag not in NOT_ALLOW_TAGS and word not in stopWords and lastWord not in stopWords:
+                addDict(preDict, nextDict, lastWord, word)
                 value = nextWordSum[lastWord] + 1
                 nextWordSum.update({lastWord: value})
-                value = preWordSum[data.word] + 1
-                preWordSum.update({data.word: value})
-            lastFlag = data.flag
-            lastWord = data.word
+                value = preWordSum[word] + 1
+                preWordSum.update({word: value})
+            lastFlag = flag
+            lastWord = word
 
             # 词性过滤并记录词性
-            if len(data.word) > 1 and data.flag in ALLOW_SPEECH_TAGS and data.word not in stopWords:
-                wordsData.append(data.word)
-                wordsFlagDict[data.word] = data.flag
+            if len(word) > 1 and flag in ALLOW_SPEECH_TAGS and word not in stopWords:
+                wordsData.append(word)
+                wordsFlagDict[word] = flag
 
     # 对词语集合进行去重
     wordsData = list(set(wordsData))
@@ -147,7 +135,7 @@ def getkeyphrase(keywords,text):
     wordDict = defaultdict(int)
     for sentence in sentences_list:
         # jieba分词&词性标注
-        psegDataList = pseg.cut(sentence)
+        psegDataList = tokenizer_manager.get_pos_tokenizer().cut(sentence)
         # 将keywords中的词语读入words中
         for wordData in keywords:
             words.append(wordData[0])
@@ -0,0 +1,83 @@
+from array import array
+from bisect import bisect_left
+
+import tokenizer_manager
+
+# 分句符号，与各预处理模块split_sentences的分句规则一致
+SENTENCE_DELIMITERS = frozenset('。！？;')
+
+
+class TokenStream:
+    """一篇文档的单次分词结果，各阶段共用，不再重复分词
+
+    对 标题 + '。' + 正文 只做一次词性标注分词，words[i]、flags[i]为第i个词语及其词性，
+    offsets[i]为其在text中的起始位置，sentenceIds[i]为所在句子的编号(分句符号本身为-1)。
+    jieba按非汉字字符切分文本块后逐块分词，分句符号总是块边界，
+    因此按位置或句子截取的结果与对标题、正文或单个句子分别分词的结果相同
+    """
+
+    def __init__(self, title, body):
+        self.title = title
+        self.body = body
+        self.text = title + '。' + body
+        self.bodyStart = len(title) + 1
+        self.words = []
+        self.flags = []
+        self.offsets = array('i')
+        self.sentenceIds = array('i')
+        offset = sentence = 0
+        for pair in tokenizer_manager.get_pos_tokenizer().cut(self.text):
+            word = pair.word
+            self.words.append(word)
+            self.flags.append(pair.flag)
+            self.offsets.append(offset)
+            if word in SENTENCE_DELIMITERS:
+                self.sentenceIds.append(-1)
+                sentence += 1
+            else:
+                self.sentenceIds.append(sentence)
+            offset += len(word)
+
+    def __len__(self):
+        return len(self.words)
+
+    def span(self, start, end):
+        """起始位置在text[start:end]中的词语下标"""
+        return range(bisect_left(self.offsets, start), bisect_left(self.offsets, end))
+
+    def titleSpan(self):
+        return self.span(0, len(self.title))
+
+    def bodySpan(self):
+        return self.span(self.bodyStart, len(self.text))
+
+    def pairs(self, indices=None):
+        """依次产出(词语, 词性)，indices为None时为全文"""
+        if indices is None:
+            return zip(self.words, self.flags)
+        return ((self.words[i], self.flags[i]) for i in indices)
+
+    def sentences(self, indices=None):
+        """按句子分组的词语下标列表，与split_sentences相同：去掉分句符号及句首尾的空白，跳过空句"""
+        if indices is None:
+            indices = range(len(self.words))
+        groups = []
+        current, currentId = [], None
+        for i in indices:
+            sentenceId = self.sentenceIds[i]
+            if sentenceId != currentId:
+                groups.append(current)
+                current, currentId = [], sentenceId
+            if sentenceId >= 0:
+                current.append(i)
+        groups.append(current)
+        result = []
+        for group in groups:
+            start, end = 0, len(group)
+            while start < end and not self.words[group[start]].strip():
+                start += 1
+            while end > start and not self.words[group[end - 1]].strip():
+                end -= 1
+            if start < end:
+                result.append(group[start:end])
+        return result
@@ -0,0 +1,83 @@
+import os
+
+import runtime_cache
+
+# jieba及其子模块在首次使用时才导入：jieba.posseg导入时加载词性标注模型，jieba.analyse导入时加载IDF词典
+
+# 获取当前文件所在目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+dict_path = os.path.join(current_dir, 'dict_file', 'dict.txt.big')
+user_dict_path = os.path.join(current_dir, 'dict_file', 'user_dict.txt')
+
+# 前缀词典缓存目录可通过环境变量单独指定，默认位于运行时缓存目录下
+JIEBA_CACHE_DIR_ENV = 'KEYWORDS_JIEBA_CACHE_DIR'
+
+# 进程内是否已完成初始化
+_initialized = False
+
+
+def get_jieba_cache_dir():
+    """获取jieba前缀词典缓存目录，不存在时自动创建"""
+    cache_dir = os.environ.get(JIEBA_CACHE_DIR_ENV) or os.path.join(runtime_cache.get_cache_dir(), 'jieba')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def initialize(cache_dir=None):
+    """在本进程中只初始化一次全局分词器jieba.dt
+
+    加载主词典dict.txt.big(不存在时使用jieba自带词典)和用户词典user_dict.txt，前缀词典缓存文件名取主词典内容的摘要，
+    词典内容变化时自动重建，多个进程可以共享同一缓存目录。各阶段通过get_tokenizer、get_pos_tokenizer取得分词器
+    """
+    global _initialized
+    import jieba
+    if _initialized:
+        return jieba.dt
+
+    # dict.txt.big不存在时使用jieba自带的词典
+    main_dict = os.path.join(os.path.dirname(jieba.__file__), jieba.DEFAULT_DICT_NAME)
+    if os.path.exists(dict_path):
+        try:
+            jieba.set_dictionary(dict_path)
+            main_dict = dict_path
+            print(f"已加载主词典: {dict_path}")
+        except Exception as e:
+            print(f"加载主词典失败: {str(e)}")
+
+    # 必须在load_userdict触发构建前缀词典之前设置
+    try:
+        jieba.dt.tmp_dir = cache_dir or get_jieba_cache_dir()
+        jieba.dt.cache_file = f"jieba.{runtime_cache.file_hash(main_dict)[:16]}.cache"
+    except Exception as e:
+        jieba.dt.tmp_dir = jieba.dt.cache_file = None
+        print(f"设置分词缓存目录失败，使用jieba默认缓存: {str(e)}")
+
+    if os.path.exists(user_dict_path):
+        try:
+            jieba.load_userdict(user_dict_path)
+            print(f"已加载用户词典: {user_dict_path}")
+        except Exception as e:
+            print(f"加载用户词典失败: {str(e)}")
+
+    jieba.initialize()
+    _initialized = True
+    return jieba.dt
+
+
+def get_tokenizer():
+    """已初始化的jieba.Tokenizer（即jieba.dt）"""
+    return initialize()
+
+
+def get_pos_tokenizer():
+    """与get_tokenizer共用词典的词性标注分词器（即jieba.posseg.dt）"""
+    initialize()
+    import jieba.posseg
+    return jieba.posseg.dt
+
+
+def get_analyse():
+    """使用上述分词器的jieba.analyse模块，提供TF-IDF与TextRank"""
+    initialize()
+    import jieba.analyse
+    return jieba.analyse
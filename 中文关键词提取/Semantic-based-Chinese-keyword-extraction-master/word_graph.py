@@ -0,0 +1,130 @@
+from array import array
+from collections.abc import Mapping
+
+
+class WordGraph(Mapping):
+    """以整数编号存储的语义图（CSR格式）
+
+    vocab[i]为第i个顶点的词语，其邻接点编号为neighbors[offsets[i]:offsets[i+1]]，
+    对应的边权为weights中的同一区间，邻接点保持建图时的顺序。
+    按词语访问时返回{邻接词语: 边权}字典，与原先的graphDatas用法兼容，
+    dijkstra和intermediate直接使用编号数组计算
+    """
+
+    def __init__(self, vocab, offsets, neighbors, weights):
+        self.vocab = vocab
+        self.index = {word: i for i, word in enumerate(vocab)}
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.weights = weights
+        self._components = None  # 连通分量，首次调用components时计算
+
+    @classmethod
+    def fromDict(cls, graphDatas):
+        """由{词语: {邻接词语: 边权}}构建，不在顶点中的邻接词语被忽略"""
+        if isinstance(graphDatas, cls):
+            return graphDatas
+        vocab = list(graphDatas.keys())
+        index = {word: i for i, word in enumerate(vocab)}
+        offsets = array('q', [0])
+        neighbors = array('i')
+        weights = array('d')
+        for word in vocab:
+            for otherWord, weight in graphDatas[word].items():
+                if otherWord in index:
+                    neighbors.append(index[otherWord])
+                    weights.append(weight)
+            offsets.append(len(neighbors))
+        return cls(vocab, offsets, neighbors, weights)
+
+    def toDict(self):
+        """转换为{词语: {邻接词语: 边权}}"""
+        return {word: self[word] for word in self.vocab}
+
+    def components(self):
+        """连通分量列表（按无向连通计算），每个分量为升序的顶点编号列表，按最小编号排列
+
+        图的数组不会被修改，结果只计算一次，统计、代价估计和居间度计算共用同一列表，调用方不应修改
+        """
+        if self._components is None:
+            self._components = self._findComponents()
+        return self._components
+
+    def _findComponents(self):
+        parent = list(range(len(self.vocab)))
+
+        def find(v):
+            while parent[v] != v:
+                parent[v] = parent[parent[v]]
+                v = parent[v]
+            return v
+
+        offsets, neighbors = self.offsets, self.neighbors
+        for v in range(len(self.vocab)):
+            for j in neighbors[offsets[v]:offsets[v + 1]]:
+                rootV, rootJ = find(v), find(j)
+                if rootV != rootJ:
+                    parent[max(rootV, rootJ)] = min(rootV, rootJ)
+        groups = {}
+        for v in range(len(self.vocab)):
+            groups.setdefault(find(v), []).append(v)
+        return list(groups.values())
+
+    def subgraph(self, members):
+        """由升序的顶点编号members构成的子图，邻接点保持原有顺序"""
+        local = {v: i for i, v in enumerate(members)}
+        offsets = array('q', [0])
+        neighbors = array('i')
+        weights = array('d')
+        for v in members:
+            for position in range(self.offsets[v], self.offsets[v + 1]):
+                j = local.get(self.neighbors[position])
+                if j is not None:
+                    neighbors.append(j)
+                    weights.append(self.weights[position])
+            offsets.append(len(neighbors))
+        return self.__class__([self.vocab[v] for v in members], offsets, neighbors, weights)
+
+    def quantizedWeights(self, scale):
+        """边权乘以scale后四舍五入为正整数，供桶队列最短路径使用"""
+        return array('i', [max(1, round(weight * scale)) for weight in self.weights])
+
+    def degree(self, i):
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def edgeCount(self):
+        """无向边的条数"""
+        return len(self.neighbors) // 2
+
+    def degreeStats(self):
+        """度分布：最小、中位、平均、最大度数及{度数: 顶点数}直方图，空图各项为0"""
+        offsets = self.offsets
+        degrees = sorted(offsets[i + 1] - offsets[i] for i in range(len(self.vocab)))
+        histogram = {}
+        for degree in degrees:
+            histogram[degree] = histogram.get(degree, 0) + 1
+        if not degrees:
+            return {'min': 0, 'median': 0, 'mean': 0.0, 'max': 0, 'histogram': histogram}
+        middle = len(degrees) // 2
+        median = degrees[middle] if len(degrees) % 2 else (degrees[middle - 1] + degrees[middle]) / 2
+        return {'min': degrees[0], 'median': median, 'mean': len(self.neighbors) / len(degrees),
+                'max': degrees[-1], 'histogram': histogram}
+
+    def __getitem__(self, word):
+        i = self.index[word]
+        start, end = self.offsets[i], self.offsets[i + 1]
+        vocab = self.vocab
+        return {vocab[j]: weight for j, weight in zip(self.neighbors[start:end], self.weights[start:end])}
+
+    def __contains__(self, word):
+        return word in self.index
+
+    def __iter__(self):
+        return iter(self.vocab)
+
+    def __len__(self):
+        return len(self.vocab)
+
+    def __reduce__(self):
+        # 序列化时只保存数组，词语编号在加载时重建
+        return self.__class__, (self.vocab, self.offsets, self.neighbors, self.weights)